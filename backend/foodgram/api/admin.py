@@ -1,8 +1,10 @@
 from django.contrib import admin
 from django.contrib.auth import get_user_model
 from django.contrib.auth.admin import UserAdmin
+from django.db.models import Count
 
-from .models import Tag, Ingredient, Recipe, RecipeIngredient
+from .models import Tag, Ingredient, Recipe, RecipeIngredient, TagRecipe
+from .paginators import EstimatedCountPaginator
 
 CustomUser = get_user_model()
 
@@ -18,24 +20,49 @@ class TagAdmin(admin.ModelAdmin):
 class IngredientAdmin(admin.ModelAdmin):
     list_display = ('name', 'measurement_unit')
     search_fields = ('name',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 class RecipeIngredientInline(admin.TabularInline):
     model = RecipeIngredient
     extra = 1
+    autocomplete_fields = ('ingredient',)
+
+
+class TagRecipeInline(admin.TabularInline):
+    model = TagRecipe
+    extra = 1
+    autocomplete_fields = ('tag',)
 
 
 @admin.register(Recipe)
 class RecipeAdmin(admin.ModelAdmin):
     list_display = ('name', 'author', 'total_favorites')
+    list_select_related = ('author',)
     search_fields = ('author__username', 'name')
     list_filter = ('tags',)
-    inlines = [RecipeIngredientInline]
+    autocomplete_fields = ('author',)
+    inlines = [RecipeIngredientInline, TagRecipeInline]
     readonly_fields = ('total_favorites',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            favorites_count=Count('favorited_by')
+        )
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        recipe = form.instance
+        recipe.tags_mask = Tag.mask_for(recipe.tags.all())
+        recipe.save(update_fields=['tags_mask'])
 
     def total_favorites(self, obj):
-        return obj.favorites.count()
+        return obj.favorites_count
     total_favorites.short_description = 'Total Favorites'
+    total_favorites.admin_order_field = 'favorites_count'
 
 
 class CustomUserAdmin(UserAdmin):
@@ -44,6 +71,8 @@ class CustomUserAdmin(UserAdmin):
     )
     search_fields = ('email', 'username')
     ordering = ('email',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     fieldsets = (
         (None, {'fields': ('email', 'username', 'password')}),
         ('Personal info', {'fields': ('first_name', 'last_name')}),
@@ -0,0 +1,168 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication
+
+from .metrics import record_cache
+
+CustomUser = get_user_model()
+
+# The password hash stays out of the snapshots, which may be written to
+# a shared cache; it is loaded as a deferred field when a view needs it.
+SNAPSHOT_FIELDS = tuple(
+    field for field in CustomUser._meta.concrete_fields
+    if field.attname != 'password'
+)
+USER_FIELDS = tuple(field.attname for field in SNAPSHOT_FIELDS)
+PK_INDEX = USER_FIELDS.index(CustomUser._meta.pk.attname)
+
+
+def user_snapshot(user):
+    return tuple(
+        field.get_prep_value(field.value_from_object(user))
+        for field in SNAPSHOT_FIELDS
+    )
+
+
+def snapshot_user(snapshot):
+    """User built from a snapshot; its saves only write changed fields."""
+    user = CustomUser.from_db(None, USER_FIELDS, snapshot)
+    user._snapshot = dict(zip(USER_FIELDS, snapshot))
+    return user
+
+
+class TokenCache:
+    """Token key to user snapshot cache.
+
+    The first level is a per-process LRU with a short TTL, the optional
+    second level is a shared Django cache, so workers can reuse each
+    other's lookups. A snapshot is a tuple of the user's concrete field
+    values without the password; every hit builds a fresh user instance
+    from it.
+
+    Saving or deleting a user and logging out drop the user's entries
+    from the shared cache and from the LRU of the process that handled
+    the change. The LRUs of other processes keep serving the old
+    snapshot, e.g. of a deactivated user, for at most the TTL. Saving a
+    user built from a snapshot only writes the fields changed on it (see
+    CustomUser.save), so the old values are not written back.
+    """
+
+    def __init__(self, max_size, ttl, shared_cache=None, shared_ttl=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.shared_cache = shared_cache
+        self.shared_ttl = shared_ttl
+        self._entries = OrderedDict()
+        self._keys_by_user = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls):
+        options = settings.TOKEN_AUTH_CACHE
+        alias = options.get('SHARED_CACHE')
+        return cls(
+            max_size=options['MAX_SIZE'],
+            ttl=options['TTL'],
+            shared_cache=caches[alias] if alias else None,
+            shared_ttl=options.get('SHARED_TTL'),
+        )
+
+    @staticmethod
+    def _shared_key(key):
+        return 'token-auth:' + hashlib.sha256(key.encode()).hexdigest()
+
+    @staticmethod
+    def _shared_user_key(user_id):
+        return f'token-auth:user:{user_id}'
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                snapshot, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    return snapshot_user(snapshot)
+                self._forget(key)
+        if self.shared_cache is None:
+            return None
+        snapshot = self.shared_cache.get(self._shared_key(key))
+        if snapshot is None:
+            return None
+        self._remember(key, snapshot)
+        return snapshot_user(snapshot)
+
+    def set(self, key, user):
+        snapshot = user_snapshot(user)
+        self._remember(key, snapshot)
+        if self.shared_cache is not None:
+            self.shared_cache.set_many({
+                self._shared_key(key): snapshot,
+                self._shared_user_key(user.pk): key,
+            }, self.shared_ttl)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._forget(key)
+        if self.shared_cache is not None:
+            self.shared_cache.delete(self._shared_key(key))
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            keys = self._keys_by_user.pop(user_id, set())
+            for key in keys:
+                self._entries.pop(key, None)
+        if self.shared_cache is not None:
+            user_key = self._shared_user_key(user_id)
+            key = self.shared_cache.get(user_key)
+            if key is not None:
+                self.shared_cache.delete_many(
+                    [self._shared_key(key), user_key]
+                )
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def _remember(self, key, snapshot):
+        user_id = snapshot[PK_INDEX]
+        with self._lock:
+            self._entries[key] = (snapshot, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            self._keys_by_user.setdefault(user_id, set()).add(key)
+            while len(self._entries) > self.max_size:
+                self._forget(next(iter(self._entries)))
+
+    def _forget(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        user_id = entry[0][PK_INDEX]
+        keys = self._keys_by_user.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[user_id]
+
+
+token_cache = TokenCache.from_settings()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication that skips the token query on cache hits."""
+
+    def authenticate_credentials(self, key):
+        user = token_cache.get(key)
+        record_cache('token', user is not None)
+        if user is not None:
+            return user, self.get_model()(key=key, user=user)
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(key, user)
+        return user, token
@@ -0,0 +1,91 @@
+import hashlib
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .constants import REFERENCE_CACHE_TTL
+from .metrics import record_cache
+
+DATA_VERSION_KEY = 'recipes:data-version'
+REFERENCE_VERSION_KEY = 'reference:version'
+UNFILTERED_PARAMS = {
+    'page', 'limit', 'offset', 'ordering', 'fields', 'omit', 'expand',
+    'facets', 'exact_count', 'recipes_limit',
+}
+USER_FILTERS = {'is_favorited', 'is_in_shopping_cart'}
+
+
+def _get_version(key):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, 1, timeout=None)
+        version = cache.get(key, 1)
+    return version
+
+
+def _bump_version(key):
+    """Move key to a new version once the transaction commits."""
+    def bump():
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, 1, timeout=None)
+    transaction.on_commit(bump)
+
+
+def get_data_version():
+    """Version of recipe, tag, user and list data, changed on writes."""
+    return _get_version(DATA_VERSION_KEY)
+
+
+def bump_data_version():
+    """Invalidate everything cached under the current data version."""
+    _bump_version(DATA_VERSION_KEY)
+
+
+def bump_reference_version():
+    """Invalidate the cached tag and ingredient lists.
+
+    They have a version of their own, so favorites, carts and
+    subscriptions, which change all the time, do not drop them.
+    """
+    _bump_version(REFERENCE_VERSION_KEY)
+
+
+def filter_signature(request, prefix, per_user=False):
+    """Cache key of the filters of request under the data version.
+
+    Pagination, ordering and field selection do not change a filtered
+    set and are left out; the user is only part of the key when a
+    filter or, with per_user, the whole set depends on them.
+    """
+    params = sorted(
+        (name, sorted(values))
+        for name, values in request.query_params.lists()
+        if name not in UNFILTERED_PARAMS
+    )
+    user = ''
+    if per_user or USER_FILTERS.intersection(name for name, _ in params):
+        user = request.user.pk or ''
+    digest = hashlib.sha256(repr((params, user)).encode()).hexdigest()
+    return f'{prefix}:{get_data_version()}:{digest}'
+
+
+def get_reference_data(serializer_class):
+    """Serialized rows of a reference table, cached under its version.
+
+    Tags and ingredients are listed with serializer_class, so the cached
+    list is what the serializer would return for the table.
+    """
+    model = serializer_class.Meta.model
+    name = model._meta.model_name
+    key = f'reference:{name}:{_get_version(REFERENCE_VERSION_KEY)}'
+    data = cache.get(key)
+    record_cache(f'reference_{name}', data is not None)
+    if data is None:
+        data = [
+            dict(item) for item in
+            serializer_class(model.objects.all(), many=True).data
+        ]
+        cache.set(key, data, REFERENCE_CACHE_TTL)
+    return data
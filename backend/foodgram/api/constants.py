@@ -3,3 +3,23 @@ MAX_STR_AND_SLUG_CHAR = 64
 MAX_LENGTH_USER_BIO_INFO = 150
 MAX_ROLE_LENGTH = 60
 MIN_PASSWORD_LENGTH = 8
+MAX_TAGS = 63
+POPULARITY_HALF_LIFE_DAYS = 7
+FAVORITE_WEIGHT = 2
+SHOPPING_CART_WEIGHT = 1
+SIMILAR_LIMIT = 6
+MAX_SIMILAR_LIMIT = 50
+SIMILAR_MAX_POSTING = 50000
+MAX_MISSING_INGREDIENTS = 5
+MAX_INGREDIENT_IDS = 100
+FACETS_CACHE_TTL = 60
+MAX_BULK_RECIPES = 100
+ESTIMATED_COUNT_THRESHOLD = 100000
+COUNT_CACHE_TTL = 60
+NOTIFICATION_KEEPALIVE = 15
+NOTIFICATION_QUEUE_SIZE = 16
+MAX_RECIPE_IDS = 100
+REFERENCE_CACHE_TTL = 300
+RECIPE_CHANGE_RETENTION_DAYS = 7
+RECIPE_CHANGE_OVERLAP = 60
+STREAM_TICKET_MAX_AGE = 60
@@ -0,0 +1,119 @@
+from datetime import timedelta
+from itertools import islice
+
+import orjson
+from asgiref.sync import sync_to_async
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from .constants import RECIPE_CHANGE_OVERLAP
+from .models import Recipe, RecipeChange, RecipeIngredient
+from .media import batched
+
+EXPORT_CHUNK_SIZE = 500
+
+
+def current_change_id():
+    """Change log position to pass as since_change to the next export.
+
+    Change ids are allocated before their rows commit, so the position
+    is the last change older than RECIPE_CHANGE_OVERLAP seconds, when all
+    lower ids are committed. The next export repeats the newer changes.
+    """
+    return RecipeChange.objects.filter(
+        created_at__lt=timezone.now() - timedelta(
+            seconds=RECIPE_CHANGE_OVERLAP
+        )
+    ).order_by('-created_at').values_list('id', flat=True).first() or 0
+
+
+def recipes_queryset():
+    return Recipe.objects.select_related('author').prefetch_related(
+        'tags',
+        Prefetch(
+            'recipeingredient_set',
+            queryset=RecipeIngredient.objects.select_related(
+                'ingredient'
+            ).order_by('id')
+        )
+    ).order_by('id')
+
+
+def recipe_record(recipe):
+    author = recipe.author
+    return {
+        'id': recipe.id,
+        'name': recipe.name,
+        'text': recipe.text,
+        'cooking_time': recipe.cooking_time,
+        'image': recipe.image.url if recipe.image else None,
+        'author': {
+            'id': author.id,
+            'username': author.username,
+            'first_name': author.first_name,
+            'last_name': author.last_name,
+        },
+        'tags': [
+            {'id': tag.id, 'name': tag.name, 'slug': tag.slug}
+            for tag in recipe.tags.all()
+        ],
+        'ingredients': [
+            {
+                'id': item.ingredient.id,
+                'name': item.ingredient.name,
+                'measurement_unit': item.ingredient.measurement_unit,
+                'amount': item.amount,
+            }
+            for item in recipe.recipeingredient_set.all()
+        ],
+    }
+
+
+def iter_recipes(since_id=0, since_change=None,
+                 chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield export records of recipes, chunk_size recipes at a time.
+
+    Without since_change every recipe with id above since_id is
+    exported; with it, every recipe logged in RecipeChange after that
+    change id is, and deleted ones are yielded as {"id", "deleted"}.
+    Tags and ingredients are prefetched per chunk, so memory use does
+    not depend on the number of recipes.
+    """
+    if since_change is None:
+        yield from map(recipe_record, recipes_queryset().filter(
+            id__gt=since_id
+        ).iterator(chunk_size=chunk_size))
+        return
+    changed = RecipeChange.objects.filter(
+        id__gt=since_change, recipe_id__gt=since_id
+    ).order_by('recipe_id').values_list('recipe_id', flat=True).distinct()
+    for recipe_ids in batched(changed.iterator(chunk_size), chunk_size):
+        found = set()
+        for recipe in recipes_queryset().filter(id__in=recipe_ids):
+            found.add(recipe.id)
+            yield recipe_record(recipe)
+        for recipe_id in recipe_ids:
+            if recipe_id not in found:
+                yield {'id': recipe_id, 'deleted': True}
+
+
+def iter_ndjson(records):
+    for record in records:
+        yield orjson.dumps(record) + b'\n'
+
+
+async def aiter_ndjson(records, chunk_size=EXPORT_CHUNK_SIZE):
+    """iter_ndjson for ASGI, chunk_size lines per step.
+
+    Django reads a synchronous iterator into a list before sending it
+    under ASGI; here every chunk is read in the synchronous thread of the
+    request, which keeps the database cursor, and sent before the next
+    one is read.
+    """
+    lines = iter_ndjson(records)
+    read_chunk = sync_to_async(lambda: b''.join(islice(lines, chunk_size)))
+    while True:
+        chunk = await read_chunk()
+        if not chunk:
+            return
+        yield chunk
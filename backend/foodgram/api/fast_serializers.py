@@ -0,0 +1,158 @@
+from collections import defaultdict
+
+from .mixins import FieldSelection, SubscriptionMixin
+from .models import CustomUser, Recipe, RecipeIngredient, TagRecipe
+
+RECIPE_FIELDS = (
+    'id', 'tags', 'author', 'ingredients',
+    'is_favorited', 'is_in_shopping_cart',
+    'name', 'image', 'text', 'cooking_time'
+)
+AUTHOR_COLUMNS = (
+    'author__email', 'author__username', 'author__first_name',
+    'author__last_name', 'author__avatar',
+)
+ANNOTATIONS = {
+    'is_favorited': 'annotated_favorites',
+    'is_in_shopping_cart': 'annotated_shopping_cart',
+}
+
+
+class RecipeValuesSerializer(SubscriptionMixin):
+    """Read-only RecipeListSerializer for pages of .values() rows.
+
+    The output is the same as RecipeListSerializer(many=True) with the
+    same FieldSelection, but no model or nested serializer instances
+    are built: rows are mapped to dicts by functions picked once per
+    page.
+    """
+
+    def __init__(self, instance, context):
+        self.instance = instance
+        self.context = context
+        request = context['request']
+        self.request = request
+        self.selection = FieldSelection(request.query_params)
+
+    @classmethod
+    def get_values(cls, queryset, selection):
+        """Turn a RecipeViewSet queryset into the page rows queryset."""
+        columns = ['id', 'author_id']
+        for field in ('name', 'image', 'text', 'cooking_time'):
+            if selection.includes(field):
+                columns.append(field)
+        if selection.is_expanded('author'):
+            columns.extend(AUTHOR_COLUMNS)
+        for field, annotation in ANNOTATIONS.items():
+            if selection.includes(field):
+                columns.append(annotation)
+        return queryset.prefetch_related(None).values(*columns)
+
+    def _image_url(self, name, storage):
+        if not name:
+            return None
+        return self.request.build_absolute_uri(storage.url(name))
+
+    def _load_tags(self, recipe_ids):
+        tags = defaultdict(list)
+        rows = TagRecipe.objects.filter(
+            recipe_id__in=recipe_ids
+        ).order_by('tag__name').values_list(
+            'recipe_id', 'tag_id', 'tag__name', 'tag__slug'
+        )
+        if self.selection.is_expanded('tags'):
+            for recipe_id, tag_id, name, slug in rows:
+                tags[recipe_id].append(
+                    {'id': tag_id, 'name': name, 'slug': slug}
+                )
+        else:
+            for recipe_id, tag_id, _, _ in rows:
+                tags[recipe_id].append(tag_id)
+        return tags
+
+    def _load_ingredients(self, recipe_ids):
+        ingredients = defaultdict(list)
+        rows = RecipeIngredient.objects.filter(
+            recipe_id__in=recipe_ids
+        ).order_by('id')
+        if self.selection.is_expanded('ingredients'):
+            for recipe_id, ingredient_id, name, unit, amount in (
+                rows.values_list(
+                    'recipe_id', 'ingredient_id', 'ingredient__name',
+                    'ingredient__measurement_unit', 'amount'
+                )
+            ):
+                ingredients[recipe_id].append({
+                    'id': ingredient_id,
+                    'name': name,
+                    'measurement_unit': unit,
+                    'amount': amount,
+                })
+        else:
+            for recipe_id, ingredient_id in rows.values_list(
+                'recipe_id', 'ingredient_id'
+            ):
+                ingredients[recipe_id].append(ingredient_id)
+        return ingredients
+
+    def _author_mapper(self):
+        if not self.selection.is_expanded('author'):
+            return lambda row: row['author_id']
+        user = self.request.user
+        subscribed = (
+            self.get_subscribed_ids(user) if user.is_authenticated
+            else set()
+        )
+        storage = CustomUser._meta.get_field('avatar').storage
+
+        def author(row):
+            return {
+                'id': row['author_id'],
+                'email': row['author__email'],
+                'username': row['author__username'],
+                'first_name': row['author__first_name'],
+                'last_name': row['author__last_name'],
+                'is_subscribed': row['author_id'] in subscribed,
+                'avatar': (
+                    storage.url(row['author__avatar'])
+                    if row['author__avatar'] else None
+                ),
+            }
+        return author
+
+    def _mappers(self, recipe_ids):
+        storage = Recipe._meta.get_field('image').storage
+        mappers = {
+            'id': lambda row: row['id'],
+            'name': lambda row: row['name'],
+            'text': lambda row: row['text'],
+            'cooking_time': lambda row: row['cooking_time'],
+            'image': lambda row: self._image_url(row['image'], storage),
+        }
+        for field, annotation in ANNOTATIONS.items():
+            mappers[field] = (
+                lambda row, annotation=annotation: row[annotation]
+            )
+        if self.selection.includes('tags'):
+            tags = self._load_tags(recipe_ids)
+            mappers['tags'] = lambda row: tags.get(row['id'], [])
+        if self.selection.includes('ingredients'):
+            ingredients = self._load_ingredients(recipe_ids)
+            mappers['ingredients'] = (
+                lambda row: ingredients.get(row['id'], [])
+            )
+        if self.selection.includes('author'):
+            mappers['author'] = self._author_mapper()
+        return [
+            (field, mappers[field]) for field in RECIPE_FIELDS
+            if self.selection.includes(field)
+        ]
+
+    @property
+    def data(self):
+        rows = list(self.instance)
+        mappers = self._mappers([row['id'] for row in rows])
+        return [
+            {field: mapper(row) for field, mapper in mappers}
+            for row in rows
+        ]
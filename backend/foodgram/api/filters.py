@@ -1,4 +1,5 @@
 import django_filters
+from django.db.models import F
 
 from .models import (
     CustomUser, Recipe, Tag, FavoriteRecipe, Ingredient
@@ -26,7 +27,8 @@ class RecipeFilter(django_filters.FilterSet):
     tags = django_filters.ModelMultipleChoiceFilter(
         field_name='tags__slug',
         to_field_name='slug',
-        queryset=Tag.objects.all()
+        queryset=Tag.objects.all(),
+        method='filter_tags'
     )
 
     class Meta:
@@ -35,6 +37,13 @@ class RecipeFilter(django_filters.FilterSet):
             'author', 'tags', 'is_favorited', 'is_in_shopping_cart'
         ]
 
+    def filter_tags(self, queryset, name, tags):
+        if not tags:
+            return queryset
+        return queryset.alias(
+            matched_tags=F('tags_mask').bitand(Tag.mask_for(tags))
+        ).filter(matched_tags__gt=0)
+
     def filter_is_favorited(self, queryset, name, value):
         user = self.request.user
         if value == 1 and user.is_authenticated:
@@ -0,0 +1,161 @@
+import json
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count, Sum
+
+from api.filters import IngredientFilter, RecipeFilter
+from api.models import (
+    Ingredient, Recipe, RecipeIngredient, Subscription, Tag
+)
+from api.views import RecipeViewSet
+
+CustomUser = get_user_model()
+
+PAGE_SIZE = 6
+
+
+def canonical_queries(user):
+    """Querysets issued by the API endpoints for the given user."""
+    request = SimpleNamespace(user=user, query_params={})
+    recipes = RecipeViewSet(request=request, action='list').get_queryset()
+    tags = list(Tag.objects.values_list('slug', flat=True)[:2])
+    author_ids = Subscription.objects.filter(
+        user=user
+    ).values_list('author_id', flat=True)[:PAGE_SIZE]
+
+    def recipe_filter(data):
+        return RecipeFilter(data, queryset=recipes, request=request).qs
+
+    return {
+        'recipes list': recipes[:PAGE_SIZE],
+        'recipes by author': recipe_filter(
+            {'author': user.id}
+        )[:PAGE_SIZE],
+        'recipes by tags': recipe_filter({'tags': tags})[:PAGE_SIZE],
+        'recipes ordered by name': recipes.order_by('name')[:PAGE_SIZE],
+        'recipes ordered by cooking time': recipes.order_by(
+            'cooking_time'
+        )[:PAGE_SIZE],
+        'trending': recipes.order_by('-popularity', '-id')[:PAGE_SIZE],
+        'favorites': recipe_filter({'is_favorited': 1})[:PAGE_SIZE],
+        'shopping cart': recipe_filter(
+            {'is_in_shopping_cart': 1}
+        )[:PAGE_SIZE],
+        'download shopping cart': RecipeIngredient.objects.filter(
+            recipe__in_shopping_cart__user=user
+        ).values(
+            'ingredient__name', 'ingredient__measurement_unit'
+        ).annotate(total_amount=Sum('amount')).order_by('ingredient__name'),
+        'subscriptions': Subscription.objects.filter(
+            user=user
+        ).select_related('author')[:PAGE_SIZE],
+        'subscription recipes preview': Recipe.objects.filter(
+            author_id__in=list(author_ids)
+        )[:PAGE_SIZE],
+        'users list': CustomUser.objects.all()[:PAGE_SIZE],
+        'ingredients prefix search': IngredientFilter(
+            {'name': 'а'}, queryset=Ingredient.objects.all()
+        ).qs,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Runs EXPLAIN for the canonical query of every API endpoint '
+        'and reports sequential scans over large tables.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threshold', type=int, default=10000,
+            help='Report sequential scans of tables with at least '
+                 'this many rows.'
+        )
+        parser.add_argument(
+            '--user', type=int, default=None,
+            help='Id of the user whose requests are explained. '
+                 'Defaults to the user with the longest shopping cart.'
+        )
+        parser.add_argument(
+            '--fail', action='store_true',
+            help='Exit with an error if any sequential scan is reported.'
+        )
+
+    def handle(self, *args, **options):
+        user = self.get_user(options['user'])
+        problems = 0
+        for name, queryset in canonical_queries(user).items():
+            scans = self.sequential_scans(queryset, options)
+            if scans:
+                problems += len(scans)
+                self.stdout.write(self.style.WARNING(
+                    f'{name}: sequential scan of '
+                    + ', '.join(
+                        f'{table} (~{rows} rows)' for table, rows in scans
+                    )
+                ))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'{name}: OK'))
+        if problems and options['fail']:
+            raise CommandError(f'{problems} sequential scan(s) found.')
+
+    def get_user(self, user_id):
+        users = CustomUser.objects.all()
+        if user_id is not None:
+            users = users.filter(id=user_id)
+        else:
+            users = users.annotate(
+                cart_size=Count('shopping_cart')
+            ).order_by('-cart_size', 'id')
+        user = users.first()
+        if user is None:
+            raise CommandError('No user to explain queries for.')
+        return user
+
+    def sequential_scans(self, queryset, options):
+        if connection.vendor == 'postgresql':
+            plan = json.loads(queryset.explain(format='json'))
+            tables = set(self.postgres_seq_scans(plan[0]['Plan']))
+        else:
+            plan = queryset.explain()
+            tables = {
+                line.split('SCAN ', 1)[1].split()[0]
+                for line in plan.splitlines()
+                if 'SCAN ' in line and 'USING' not in line
+            }
+        if options['verbosity'] > 1:
+            self.stdout.write(
+                plan if isinstance(plan, str) else json.dumps(plan, indent=2)
+            )
+        sizes = self.table_sizes(tables)
+        return sorted(
+            (table, rows) for table, rows in sizes.items()
+            if rows >= options['threshold']
+        )
+
+    def postgres_seq_scans(self, node):
+        if node['Node Type'] == 'Seq Scan':
+            yield node['Relation Name']
+        for child in node.get('Plans', ()):
+            yield from self.postgres_seq_scans(child)
+
+    def table_sizes(self, tables):
+        sizes = {}
+        with connection.cursor() as cursor:
+            for table in tables:
+                if connection.vendor == 'postgresql':
+                    cursor.execute(
+                        'SELECT reltuples::bigint FROM pg_class '
+                        'WHERE relname = %s', [table]
+                    )
+                else:
+                    cursor.execute(
+                        f'SELECT COUNT(*) FROM '
+                        f'{connection.ops.quote_name(table)}'
+                    )
+                row = cursor.fetchone()
+                sizes[table] = row[0] if row else 0
+        return sizes
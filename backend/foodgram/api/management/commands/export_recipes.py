@@ -0,0 +1,55 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.export import (
+    EXPORT_CHUNK_SIZE, current_change_id, iter_ndjson, iter_recipes
+)
+from api.recipe_index import changes_pruned
+
+
+class Command(BaseCommand):
+    help = (
+        'Streams recipes with their author, tags and ingredients as '
+        'newline-delimited JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since-id', type=int, default=0)
+        parser.add_argument(
+            '--since-change', type=int, default=None,
+            help='Only export recipes changed after this change id.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=EXPORT_CHUNK_SIZE
+        )
+        parser.add_argument('--output', help='File path, stdout if omitted.')
+
+    def handle(self, *args, **options):
+        since_change = options['since_change']
+        if since_change is not None and changes_pruned(since_change):
+            raise CommandError(
+                'The changes after --since-change were pruned from the '
+                'change log, run a full export.'
+            )
+        change_id = current_change_id()
+        lines = iter_ndjson(iter_recipes(
+            options['since_id'], options['since_change'],
+            options['chunk_size']
+        ))
+        exported = 0
+        if options['output']:
+            output = open(options['output'], 'wb')
+        else:
+            output = sys.stdout.buffer
+        try:
+            for line in lines:
+                output.write(line)
+                exported += 1
+        finally:
+            if options['output']:
+                output.close()
+        self.stderr.write(self.style.SUCCESS(
+            f'Exported {exported} recipes. '
+            f'Continue with --since-change {change_id}.'
+        ))
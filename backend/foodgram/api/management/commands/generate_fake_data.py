@@ -0,0 +1,237 @@
+import itertools
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+
+from api.caching import bump_data_version
+from api.models import (
+    FavoriteRecipe, Ingredient, Recipe, RecipeIngredient, ShoppingCart,
+    Subscription, Tag, TagRecipe
+)
+
+CustomUser = get_user_model()
+
+FAKE_PASSWORD = 'fake-password'
+RECIPE_IMAGE = 'recipes/fake.png'
+RECIPE_TEXT = (
+    'Смешайте все ингредиенты, доведите до готовности '
+    'и подавайте к столу. '
+)
+
+
+def zipf_cum_weights(size, exponent):
+    """Cumulative Zipf weights: rank 1 is the most popular item."""
+    return list(itertools.accumulate(
+        1 / rank ** exponent for rank in range(1, size + 1)
+    ))
+
+
+class FakeDataGenerator:
+    """Builds a production-like dataset in batches with bulk_create."""
+
+    def __init__(self, seed, batch_size, skew, stdout=None):
+        self.random = random.Random(seed)
+        self.batch_size = batch_size
+        self.skew = skew
+        self.stdout = stdout
+        self.stats = []
+
+    def _insert(self, model, objects, keep_ids=False):
+        """Insert a lazy stream of objects, one batch at a time."""
+        started = time.monotonic()
+        created = []
+        rows = 0
+        iterator = iter(objects)
+        while True:
+            batch = list(itertools.islice(iterator, self.batch_size))
+            if not batch:
+                break
+            model.objects.bulk_create(batch)
+            if keep_ids:
+                created.extend(obj.pk for obj in batch)
+            rows += len(batch)
+        elapsed = time.monotonic() - started
+        self.stats.append((model._meta.verbose_name_plural, rows, elapsed))
+        if self.stdout:
+            self.stdout.write(
+                f'{model._meta.verbose_name_plural}: {rows} rows '
+                f'in {elapsed:.2f}s ({rows / max(elapsed, 1e-6):.0f} rows/s)'
+            )
+        return created
+
+    def _pick(self, population, cum_weights, count):
+        """Pick up to count distinct items from a skewed population."""
+        count = min(count, len(population))
+        picked = set()
+        attempts = 0
+        while len(picked) < count and attempts < count * 10:
+            picked.update(self.random.choices(
+                population, cum_weights=cum_weights, k=count - len(picked)
+            ))
+            attempts += 1
+        return picked
+
+    def _length(self, mean, limit):
+        """Long-tailed list length with the given mean."""
+        if mean <= 0:
+            return 0
+        return min(int(self.random.expovariate(1 / mean)) + 1, limit)
+
+    def create_users(self, count, prefix):
+        password = make_password(FAKE_PASSWORD)
+        offset = CustomUser.objects.filter(
+            username__startswith=prefix
+        ).count()
+        return self._insert(CustomUser, (
+            CustomUser(
+                username=f'{prefix}{number}',
+                email=f'{prefix}{number}@example.com',
+                first_name='Имя',
+                last_name=f'Фамилия {number}',
+                password=password,
+            )
+            for number in range(offset, offset + count)
+        ), keep_ids=True)
+
+    def create_recipes(self, count, authors, max_ingredients):
+        tag_bits = dict(Tag.objects.values_list('bit', 'id'))
+        ingredient_ids = list(Ingredient.objects.values_list('id', flat=True))
+        if not tag_bits or not ingredient_ids:
+            raise CommandError(
+                'Ingredient and Tag tables must be filled '
+                'before generating recipes.'
+            )
+        self.random.shuffle(ingredient_ids)
+        author_weights = zipf_cum_weights(len(authors), self.skew)
+        ingredient_weights = zipf_cum_weights(
+            len(ingredient_ids), self.skew
+        )
+        bits = list(tag_bits)
+        tags_masks = [
+            sum(1 << bit for bit in self.random.sample(
+                bits, self.random.randint(1, min(3, len(bits)))
+            ))
+            for _ in range(count)
+        ]
+        recipe_ids = self._insert(Recipe, (
+            Recipe(
+                author_id=author_id,
+                name=f'Рецепт {number}',
+                image=RECIPE_IMAGE,
+                text=RECIPE_TEXT * self.random.randint(1, 10),
+                cooking_time=self.random.randint(1, 180),
+                tags_mask=tags_mask,
+            )
+            for number, (author_id, tags_mask) in enumerate(zip(
+                self.random.choices(
+                    authors, cum_weights=author_weights, k=count
+                ),
+                tags_masks
+            ))
+        ), keep_ids=True)
+        self._insert(RecipeIngredient, (
+            RecipeIngredient(
+                recipe_id=recipe_id,
+                ingredient_id=ingredient_id,
+                amount=self.random.randint(1, 1000),
+            )
+            for recipe_id in recipe_ids
+            for ingredient_id in self._pick(
+                ingredient_ids, ingredient_weights,
+                self.random.randint(1, max_ingredients)
+            )
+        ))
+        self._insert(TagRecipe, (
+            TagRecipe(recipe_id=recipe_id, tag_id=tag_id)
+            for recipe_id, tags_mask in zip(recipe_ids, tags_masks)
+            for bit, tag_id in tag_bits.items()
+            if tags_mask & 1 << bit
+        ))
+        return recipe_ids
+
+    def create_user_links(self, model, users, targets, mean, limit,
+                          field='recipe_id', skip_self=False):
+        """Link users to popular targets: favorites, carts, follows."""
+        targets = list(targets)
+        weights = zipf_cum_weights(len(targets), self.skew)
+        self._insert(model, (
+            model(user_id=user_id, **{field: target_id})
+            for user_id in users
+            for target_id in self._pick(
+                targets, weights, self._length(mean, limit)
+            )
+            if not (skip_self and target_id == user_id)
+        ))
+
+
+class Command(BaseCommand):
+    help = (
+        'Generates a large synthetic dataset: users, recipes, '
+        'favorites, shopping carts and subscriptions.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument(
+            '--max-ingredients', type=int, default=15,
+            help='Upper bound of ingredients per recipe.'
+        )
+        parser.add_argument(
+            '--favorites', type=float, default=20,
+            help='Mean number of favorite recipes per user.'
+        )
+        parser.add_argument(
+            '--cart', type=float, default=5,
+            help='Mean shopping cart length per user.'
+        )
+        parser.add_argument(
+            '--subscriptions', type=float, default=10,
+            help='Mean number of followed authors per user.'
+        )
+        parser.add_argument(
+            '--skew', type=float, default=1.1,
+            help='Zipf exponent for author, recipe and ingredient '
+                 'popularity.'
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument('--prefix', default='fake_user_')
+
+    def handle(self, *args, **options):
+        if options['users'] < 1:
+            raise CommandError('At least one user is required.')
+        generator = FakeDataGenerator(
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            skew=options['skew'],
+            stdout=self.stdout,
+        )
+        started = time.monotonic()
+        users = generator.create_users(options['users'], options['prefix'])
+        recipes = generator.create_recipes(
+            options['recipes'], users, options['max_ingredients']
+        )
+        generator.create_user_links(
+            FavoriteRecipe, users, recipes, options['favorites'],
+            limit=len(recipes)
+        )
+        generator.create_user_links(
+            ShoppingCart, users, recipes, options['cart'],
+            limit=len(recipes)
+        )
+        generator.create_user_links(
+            Subscription, users, users, options['subscriptions'],
+            limit=len(users) - 1, field='author_id', skip_self=True
+        )
+        # bulk_create sends no signals, drop the cached lists and counts.
+        bump_data_version()
+        elapsed = time.monotonic() - started
+        rows = sum(count for _, count, _ in generator.stats)
+        self.stdout.write(self.style.SUCCESS(
+            f'Inserted {rows} rows in {elapsed:.2f}s '
+            f'({rows / max(elapsed, 1e-6):.0f} rows/s).'
+        ))
@@ -0,0 +1,50 @@
+import csv
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.caching import bump_reference_version
+from api.models import Ingredient
+
+
+def read_ingredients(path):
+    """(name, measurement_unit) pairs from a JSON or a CSV file."""
+    with open(path, encoding='utf-8') as file:
+        if path.endswith('.json'):
+            return [
+                (row['name'], row['measurement_unit'])
+                for row in json.load(file)
+            ]
+        return [tuple(row) for row in csv.reader(file) if row]
+
+
+class Command(BaseCommand):
+    help = (
+        'Loads ingredients from data/ingredients.json or '
+        'data/ingredients.csv, skipping the ones already in the database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        try:
+            rows = read_ingredients(options['path'])
+        except (OSError, ValueError, KeyError) as error:
+            raise CommandError(f'Cannot read ingredients: {error}')
+        with transaction.atomic():
+            existing = set(Ingredient.objects.values_list(
+                'name', 'measurement_unit'
+            ))
+            created = Ingredient.objects.bulk_create([
+                Ingredient(name=name, measurement_unit=measurement_unit)
+                for name, measurement_unit in dict.fromkeys(rows)
+                if (name, measurement_unit) not in existing
+            ], batch_size=options['batch_size'])
+            # bulk_create sends no signals, drop the cached lists here.
+            bump_reference_version()
+        self.stdout.write(self.style.SUCCESS(
+            f'Loaded {len(created)} ingredients.'
+        ))
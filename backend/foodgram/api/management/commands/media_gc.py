@@ -0,0 +1,36 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from api.media import find_orphans
+
+
+class Command(BaseCommand):
+    help = (
+        'Deletes recipe images and avatars that no recipe or user '
+        'references any more.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--min-age', type=int, default=3600,
+            help='Keep files modified less than this many seconds ago.'
+        )
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        deleted = 0
+        for storage, names in find_orphans(
+            options['batch_size'], timedelta(seconds=options['min_age'])
+        ):
+            for name in names:
+                if options['dry_run']:
+                    self.stdout.write(name)
+                else:
+                    storage.delete(name)
+            deleted += len(names)
+        action = 'Found' if options['dry_run'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f'{action} {deleted} orphaned files.'
+        ))
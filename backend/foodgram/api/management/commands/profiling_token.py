@@ -0,0 +1,24 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from api.profiling import make_profiling_token
+
+
+class Command(BaseCommand):
+    help = (
+        'Prints a signed token that profiles requests sent with it in the '
+        'X-Profile header or the _profile query parameter.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help='Email of a staff user.')
+
+    def handle(self, *args, **options):
+        user = get_user_model().objects.filter(
+            email=options['email'], is_staff=True, is_active=True
+        ).first()
+        if user is None:
+            raise CommandError(
+                f'No active staff user with email {options["email"]}.'
+            )
+        self.stdout.write(make_profiling_token(user))
@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.constants import RECIPE_CHANGE_RETENTION_DAYS
+from api.recipe_index import prune_recipe_changes
+
+
+class Command(BaseCommand):
+    help = (
+        'Deletes recipe change log rows older than the retention period. '
+        'Similar recipe indexes and incremental exports behind the pruned '
+        'rows start over.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=RECIPE_CHANGE_RETENTION_DAYS,
+            help='Keep changes logged less than this many days ago.'
+        )
+
+    def handle(self, *args, **options):
+        deleted = prune_recipe_changes(
+            timezone.now() - timedelta(days=options['days'])
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {deleted} change log rows.'
+        ))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from api.ranking import rebuild_popularity, refresh_popularity
+
+
+class Command(BaseCommand):
+    help = (
+        'Adds favorite and shopping cart events queued since the last '
+        'run to the time-decayed recipe popularity scores.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help='Recompute all scores from the existing favorites and '
+                 'shopping carts, e.g. after a bulk load.'
+        )
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            recipes = rebuild_popularity(options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f'Rebuilt the scores of {recipes} recipes.'
+            ))
+            return
+        processed = refresh_popularity(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {processed} events.'
+        ))
@@ -0,0 +1,161 @@
+import logging
+import queue
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import CustomUser, Recipe
+
+logger = logging.getLogger(__name__)
+
+MEDIA_FIELDS = (
+    (Recipe, 'image'),
+    (CustomUser, 'avatar'),
+)
+
+
+class MediaCleaner:
+    """Deletes stored files in a background thread.
+
+    Storage calls can be slow (network storages, many files per cascade
+    delete), so views only queue the names. A file is only deleted if,
+    right before the deletion, no row references it and no upload reused
+    it in the last MEDIA_CLEANUP_GRACE seconds: the row of such an upload
+    may not be committed yet. Jobs still queued when the process exits
+    and files kept for the grace period are left to `manage.py media_gc`.
+    """
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def delete(self, storage, name):
+        if not settings.MEDIA_CLEANUP_ASYNC:
+            self._delete(storage, name)
+            return
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(
+                    target=self._run, name='media-cleaner', daemon=True
+                )
+                self.thread.start()
+        self.queue.put((storage, name))
+
+    def join(self):
+        """Wait until every queued file is deleted."""
+        self.queue.join()
+
+    @staticmethod
+    def _delete(storage, name):
+        try:
+            if is_referenced(name) or is_recent(
+                storage, name, timezone.now(),
+                timedelta(seconds=settings.MEDIA_CLEANUP_GRACE)
+            ):
+                return
+            storage.delete(name)
+        except Exception:
+            logger.exception('Could not delete media file %s', name)
+
+    def _run(self):
+        while True:
+            storage, name = self.queue.get()
+            close_old_connections()
+            try:
+                self._delete(storage, name)
+            finally:
+                self.queue.task_done()
+
+
+media_cleaner = MediaCleaner()
+
+
+def delete_files(*files):
+    """Delete the files of FieldFiles once the transaction commits.
+
+    Empty fields are skipped. Deleting after commit keeps the file when
+    the change that dropped the reference is rolled back, and files are
+    content-addressed, so the cleaner keeps a file another row uses.
+    """
+    for file in files:
+        if not file:
+            continue
+        transaction.on_commit(
+            lambda storage=file.storage, name=file.name: (
+                media_cleaner.delete(storage, name)
+            )
+        )
+
+
+def is_referenced(name):
+    return any(
+        model.objects.filter(**{field_name: name}).exists()
+        for model, field_name in MEDIA_FIELDS
+    )
+
+
+def walk(storage, directory):
+    """Names of all files under directory, one directory at a time."""
+    try:
+        directories, files = storage.listdir(directory)
+    except FileNotFoundError:
+        return
+    for name in files:
+        yield f'{directory}/{name}'
+    for name in directories:
+        yield from walk(storage, f'{directory}/{name}')
+
+
+def batched(names, size):
+    batch = []
+    for name in names:
+        batch.append(name)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def find_orphans(batch_size=1000, min_age=None):
+    """Yield (storage, names) batches of files no row references.
+
+    The storage tree is listed lazily and every batch of names is
+    checked with one query per file field, so memory does not grow with
+    the number of files or rows. Files younger than min_age are kept:
+    an upload is stored before the row that references it is committed.
+    """
+    fields = {}
+    for model, field_name in MEDIA_FIELDS:
+        field = model._meta.get_field(field_name)
+        directory = field.upload_to.strip('/')
+        fields.setdefault((field.storage, directory), []).append(
+            (model, field_name)
+        )
+    now = timezone.now()
+    for (storage, directory), models in fields.items():
+        for batch in batched(walk(storage, directory), batch_size):
+            referenced = set()
+            for model, field_name in models:
+                referenced.update(model.objects.filter(**{
+                    f'{field_name}__in': batch
+                }).values_list(field_name, flat=True))
+            orphans = [
+                name for name in batch if name not in referenced
+                and not is_recent(storage, name, now, min_age)
+            ]
+            if orphans:
+                yield storage, orphans
+
+
+def is_recent(storage, name, now, min_age):
+    if not min_age:
+        return False
+    try:
+        return now - storage.get_modified_time(name) < min_age
+    except NotImplementedError:
+        return False
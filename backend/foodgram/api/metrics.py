@@ -0,0 +1,169 @@
+import os
+import time
+
+from asgiref.sync import (
+    iscoroutinefunction, markcoroutinefunction, sync_to_async
+)
+from django.db import connection
+from django.http import HttpResponse
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram,
+    REGISTRY, generate_latest, multiprocess
+)
+
+SIZE_BUCKETS = (
+    100, 300, 1000, 3000, 10000, 30000, 100000, 300000, 1000000, 3000000
+)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144)
+
+REQUEST_DURATION = Histogram(
+    'foodgram_request_duration_seconds', 'Request latency.',
+    ['route', 'method', 'status']
+)
+REQUEST_SIZE = Histogram(
+    'foodgram_request_size_bytes', 'Request body size.',
+    ['route'], buckets=SIZE_BUCKETS
+)
+RESPONSE_SIZE = Histogram(
+    'foodgram_response_size_bytes', 'Response body size.',
+    ['route'], buckets=SIZE_BUCKETS
+)
+DB_QUERIES = Histogram(
+    'foodgram_db_queries', 'SQL queries per request.',
+    ['route'], buckets=QUERY_BUCKETS
+)
+DB_DURATION = Histogram(
+    'foodgram_db_duration_seconds', 'Time spent in SQL per request.',
+    ['route']
+)
+ACTIVE_REQUESTS = Gauge(
+    'foodgram_active_requests', 'Requests being served.',
+    multiprocess_mode='livesum'
+)
+CACHE_REQUESTS = Counter(
+    'foodgram_cache_requests_total', 'Cache lookups.', ['cache', 'result']
+)
+WORKERS = Gauge(
+    'foodgram_workers', 'Live worker processes.',
+    multiprocess_mode='livesum'
+)
+
+
+def record_cache(cache, hit):
+    CACHE_REQUESTS.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+def route_name(view_func, method):
+    """ViewSet.action of DRF views, the function name of other views."""
+    cls = getattr(view_func, 'cls', None)
+    if cls is None:
+        return getattr(view_func, '__name__', 'unknown')
+    actions = getattr(view_func, 'actions', None) or {}
+    return f'{cls.__name__}.{actions.get(method.lower(), method.lower())}'
+
+
+class QueryTimer:
+    """execute_wrapper counting the queries of one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+    def install(self):
+        connection.execute_wrappers.append(self)
+
+    def uninstall(self):
+        connection.execute_wrappers.remove(self)
+
+
+class MetricsMiddleware:
+    """Per-route latency, size and SQL histograms for Prometheus.
+
+    Routes are labeled ViewSet.action (e.g. RecipeViewSet.favorite), so
+    the label set is bounded by the URL configuration. Under ASGI the
+    query timer is installed on the connection of the thread that runs
+    the synchronous views of the request; queries of async views are not
+    counted. A request stays active until its response is closed, so open
+    streams are counted too.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        started = time.perf_counter()
+        timer = QueryTimer()
+        ACTIVE_REQUESTS.inc()
+        try:
+            with connection.execute_wrapper(timer):
+                response = self.get_response(request)
+        except BaseException:
+            ACTIVE_REQUESTS.dec()
+            raise
+        self.observe(request, response, started, timer)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        timer = QueryTimer()
+        await sync_to_async(timer.install)()
+        ACTIVE_REQUESTS.inc()
+        try:
+            response = await self.get_response(request)
+        except BaseException:
+            ACTIVE_REQUESTS.dec()
+            raise
+        finally:
+            await sync_to_async(timer.uninstall)()
+        self.observe(request, response, started, timer)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.metrics_route = route_name(view_func, request.method)
+
+    @staticmethod
+    def observe(request, response, started, timer):
+        response._resource_closers.append(ACTIVE_REQUESTS.dec)
+        route = getattr(request, 'metrics_route', 'unmatched')
+        REQUEST_DURATION.labels(
+            route, request.method, response.status_code
+        ).observe(time.perf_counter() - started)
+        REQUEST_SIZE.labels(route).observe(
+            int(request.META.get('CONTENT_LENGTH') or 0)
+        )
+        if not response.streaming:
+            RESPONSE_SIZE.labels(route).observe(len(response.content))
+        DB_QUERIES.labels(route).observe(timer.count)
+        DB_DURATION.labels(route).observe(timer.duration)
+
+
+def metrics_view(request):
+    """Metrics of this process, or of all workers in multiprocess mode.
+
+    With PROMETHEUS_MULTIPROC_DIR set, every worker writes its samples
+    to that directory and any worker can serve the merged view.
+    """
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(
+        generate_latest(registry), content_type=CONTENT_TYPE_LATEST
+    )
@@ -0,0 +1,38 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_content_addressed_media'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PopularityEpoch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField(verbose_name='Начало отсчёта')),
+            ],
+            options={
+                'verbose_name': 'Начало отсчёта популярности',
+                'verbose_name_plural': 'Начало отсчёта популярности',
+            },
+        ),
+        migrations.CreateModel(
+            name='PopularityEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recipe_id', models.BigIntegerField(verbose_name='Id рецепта')),
+                ('weight', models.SmallIntegerField(verbose_name='Вес')),
+                ('created_at', models.DateTimeField(verbose_name='Время события')),
+            ],
+            options={
+                'verbose_name': 'Событие популярности',
+                'verbose_name_plural': 'События популярности',
+            },
+        ),
+        migrations.DeleteModel(
+            name='PopularityCheckpoint',
+        ),
+    ]
@@ -0,0 +1,17 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_popularity_events'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipechange',
+            name='created_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Время изменения'),
+        ),
+    ]
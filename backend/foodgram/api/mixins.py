@@ -1,7 +1,9 @@
-from rest_framework import status
+import copy
+
+from rest_framework import serializers, status
 from rest_framework.response import Response
 
-from .models import Subscription, ShoppingCart, Recipe
+from .models import Subscription, ShoppingCart
 
 
 class AddDeleteRecipeMixin:
@@ -36,6 +38,9 @@ class AddDeleteRecipeMixin:
 
 class FavoriteShoppingCartMixin:
     def is_in_list(self, obj, list_name):
+        annotated = getattr(obj, f'annotated_{list_name}', None)
+        if annotated is not None:
+            return annotated
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             if list_name == 'favorites':
@@ -57,23 +62,98 @@ class FavoriteShoppingCartMixin:
 
 class RecipeListActionsMixin:
     def _get_user_recipes(self, request, related_field):
-        recipes = Recipe.objects.filter(
+        recipes = self.get_queryset().filter(
             **{f"{related_field}__user": request.user}
-        ).select_related('author').prefetch_related(
-            'tags', 'recipeingredient_set__ingredient'
         )
-        page = self.paginate_queryset(recipes)
-        serializer = self.get_serializer(page, many=True)
-        return self.get_paginated_response(serializer.data)
+        return self._get_recipes_page(recipes)
 
 
 class SubscriptionMixin:
+    def get_subscribed_ids(self, user):
+        if 'subscribed_ids' not in self.context:
+            self.context['subscribed_ids'] = set(
+                Subscription.objects.filter(
+                    user=user
+                ).values_list('author_id', flat=True)
+            )
+        return self.context['subscribed_ids']
+
     def get_is_subscribed(self, obj):
         request = self.context.get('request')
         if not request or not request.user.is_authenticated:
             return False
         author = getattr(obj, 'author', obj)
-        return Subscription.objects.filter(
-            user=request.user,
-            author=author
-        ).exists()
+        if author.id == request.user.id:
+            return False
+        return author.id in self.get_subscribed_ids(request.user)
+
+
+class FieldSelection:
+    """Field selection from the fields, omit and expand query params.
+
+    Without fields every field is returned and nested relations are
+    expanded. With fields only the listed fields are returned and nested
+    relations are rendered as primary keys unless listed in expand.
+    """
+
+    def __init__(self, query_params):
+        self.only = self._split(query_params.get('fields'))
+        self.omit = self._split(query_params.get('omit')) or set()
+        self.expand = self._split(query_params.get('expand')) or set()
+
+    @staticmethod
+    def _split(value):
+        if not value:
+            return None
+        return {name.strip() for name in value.split(',') if name.strip()}
+
+    def __bool__(self):
+        return bool(self.only or self.omit or self.expand)
+
+    def includes(self, name):
+        if name in self.omit:
+            return False
+        return (
+            self.only is None or name in self.only or name in self.expand
+        )
+
+    def is_expanded(self, name):
+        return self.includes(name) and (
+            self.only is None or name in self.expand
+        )
+
+
+class SparseFieldsMixin:
+    """Prunes top-level serializer fields by the request FieldSelection.
+
+    collapsed_fields maps nested relations to the fields that render
+    them as primary keys when they are not expanded.
+    """
+
+    collapsed_fields = {}
+
+    def _is_top_level(self):
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is None or not self._is_top_level():
+            return fields
+        selection = FieldSelection(
+            getattr(request, 'query_params', request.GET)
+        )
+        if not selection:
+            return fields
+        for name in list(fields):
+            if not selection.includes(name):
+                del fields[name]
+            elif (
+                name in self.collapsed_fields
+                and not selection.is_expanded(name)
+            ):
+                fields[name] = copy.deepcopy(self.collapsed_fields[name])
+        return fields
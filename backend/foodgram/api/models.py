@@ -1,9 +1,12 @@
 from django.contrib.auth.models import AbstractUser
+from django.core.exceptions import ValidationError
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.utils import timezone
 from django.utils.text import slugify
 
-from .constants import MAX_STR_AND_SLUG_CHAR, MAX_STRING_CHAR
+from .constants import MAX_STR_AND_SLUG_CHAR, MAX_STRING_CHAR, MAX_TAGS
+from .storage import content_storage
 
 
 class CustomUser(AbstractUser):
@@ -14,6 +17,8 @@ class CustomUser(AbstractUser):
     )
     avatar = models.ImageField(
         upload_to='avatars/',
+        storage=content_storage,
+        db_index=True,
         null=True,
         blank=True,
         verbose_name='Аватар.'
@@ -27,6 +32,29 @@ class CustomUser(AbstractUser):
     def __str__(self):
         return self.username
 
+    def save(self, *args, **kwargs):
+        """Save a token cache snapshot (api.authentication) field-wise.
+
+        request.user of a token request is built from a snapshot that may
+        be older than the row, so a full save only writes the fields that
+        differ from the snapshot and the password when it is loaded, and
+        does not revert changes made by other processes.
+        """
+        snapshot = getattr(self, '_snapshot', None)
+        if snapshot is None or kwargs.get('update_fields') is not None:
+            return super().save(*args, **kwargs)
+        fields = {
+            field.attname: field.get_prep_value(field.value_from_object(self))
+            for field in self._meta.concrete_fields
+            if field.attname in snapshot or field.attname in self.__dict__
+        }
+        kwargs['update_fields'] = [
+            name for name, value in fields.items()
+            if name not in snapshot or snapshot[name] != value
+        ]
+        super().save(*args, **kwargs)
+        snapshot.update(fields)
+
     @property
     def subscriptions(self):
         return CustomUser.objects.filter(
@@ -77,6 +105,10 @@ class Tag(models.Model):
         max_length=MAX_STR_AND_SLUG_CHAR,
         unique=True, verbose_name='Слаг'
     )
+    bit = models.PositiveSmallIntegerField(
+        unique=True, editable=False,
+        verbose_name='Бит в маске тегов рецепта'
+    )
 
     class Meta:
         verbose_name = 'Тег'
@@ -86,11 +118,32 @@ class Tag(models.Model):
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.name)
+        if self.bit is None:
+            used_bits = set(Tag.objects.values_list('bit', flat=True))
+            self.bit = next(
+                (bit for bit in range(MAX_TAGS) if bit not in used_bits),
+                None
+            )
+            if self.bit is None:
+                raise ValidationError(
+                    f'No more than {MAX_TAGS} tags are supported.'
+                )
         super().save(*args, **kwargs)
 
     def __str__(self):
         return self.name
 
+    @property
+    def mask(self):
+        return 1 << self.bit
+
+    @staticmethod
+    def mask_for(tags):
+        mask = 0
+        for tag in tags:
+            mask |= tag.mask
+        return mask
+
 
 class Ingredient(models.Model):
     name = models.CharField(
@@ -106,6 +159,13 @@ class Ingredient(models.Model):
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
         ordering = ('name',)
+        indexes = [
+            models.Index(
+                fields=['name'],
+                name='ingredient_name_prefix_idx',
+                opclasses=['varchar_pattern_ops'],
+            ),
+        ]
 
     def __str__(self):
         return f'{self.name} - {self.measurement_unit}'
@@ -124,6 +184,8 @@ class Recipe(models.Model):
     )
     image = models.ImageField(
         upload_to='recipes/',
+        storage=content_storage,
+        db_index=True,
         verbose_name='Изображение рецепта'
     )
     text = models.TextField(
@@ -141,6 +203,14 @@ class Recipe(models.Model):
         related_name='recipes',
         verbose_name='Теги'
     )
+    tags_mask = models.BigIntegerField(
+        default=0, editable=False,
+        verbose_name='Маска тегов'
+    )
+    popularity = models.FloatField(
+        default=0, db_index=True, editable=False,
+        verbose_name='Популярность'
+    )
     cooking_time = models.PositiveIntegerField(
         validators=[
             MinValueValidator(1), MaxValueValidator(1000)
@@ -158,6 +228,15 @@ class Recipe(models.Model):
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ('-pk',)
+        indexes = [
+            models.Index(
+                fields=['author', '-id'], name='recipe_author_id_idx'
+            ),
+            models.Index(fields=['name'], name='recipe_name_idx'),
+            models.Index(
+                fields=['cooking_time'], name='recipe_cooking_time_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -233,6 +312,9 @@ class ShoppingCart(models.Model):
         on_delete=models.CASCADE,
         related_name='in_shopping_cart'
     )
+    created_at = models.DateTimeField(
+        auto_now_add=True, verbose_name='Дата добавления'
+    )
 
     class Meta:
         verbose_name = 'Список покупок'
@@ -256,6 +338,9 @@ class FavoriteRecipe(models.Model):
         on_delete=models.CASCADE,
         related_name='favorited_by',
     )
+    created_at = models.DateTimeField(
+        auto_now_add=True, verbose_name='Дата добавления'
+    )
 
     class Meta:
         verbose_name = 'Избранное'
@@ -266,3 +351,41 @@ class FavoriteRecipe(models.Model):
                 name='unique_favorite',
             )
         ]
+
+
+class PopularityEvent(models.Model):
+    recipe_id = models.BigIntegerField(verbose_name='Id рецепта')
+    weight = models.SmallIntegerField(verbose_name='Вес')
+    created_at = models.DateTimeField(verbose_name='Время события')
+
+    class Meta:
+        verbose_name = 'Событие популярности'
+        verbose_name_plural = 'События популярности'
+
+    def __str__(self):
+        return f'{self.recipe_id}: {self.weight:+}'
+
+
+class PopularityEpoch(models.Model):
+    started_at = models.DateTimeField(verbose_name='Начало отсчёта')
+
+    class Meta:
+        verbose_name = 'Начало отсчёта популярности'
+        verbose_name_plural = 'Начало отсчёта популярности'
+
+    def __str__(self):
+        return f'{self.started_at:%Y-%m-%d %H:%M}'
+
+
+class RecipeChange(models.Model):
+    recipe_id = models.BigIntegerField(verbose_name='Id рецепта')
+    created_at = models.DateTimeField(
+        default=timezone.now, db_index=True, verbose_name='Время изменения'
+    )
+
+    class Meta:
+        verbose_name = 'Изменение рецепта'
+        verbose_name_plural = 'Изменения рецептов'
+
+    def __str__(self):
+        return f'{self.id}: {self.recipe_id}'
@@ -0,0 +1,131 @@
+import asyncio
+import threading
+
+import orjson
+from django.conf import settings
+from django.core import signing
+from django.utils.module_loading import import_string
+
+from .constants import (
+    NOTIFICATION_KEEPALIVE, NOTIFICATION_QUEUE_SIZE, STREAM_TICKET_MAX_AGE
+)
+from .models import CustomUser, Subscription
+
+STREAM_TICKET_SALT = 'api.notifications'
+
+
+class Subscriber:
+    """One open event stream: a user id and a small bounded queue."""
+
+    __slots__ = ('user_id', 'queue', 'loop')
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.queue = asyncio.Queue(NOTIFICATION_QUEUE_SIZE)
+        self.loop = asyncio.get_running_loop()
+
+    def deliver(self, message):
+        if not self.queue.full():
+            self.queue.put_nowait(message)
+
+
+class LocalBroker:
+    """In-process pub/sub between publishing threads and event streams.
+
+    Only streams served by the same process receive messages. A broker
+    for several processes implements the same three methods on top of a
+    shared channel and is selected with NOTIFICATIONS_BROKER.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = {}
+
+    def subscribe(self, user_id):
+        subscriber = Subscriber(user_id)
+        with self.lock:
+            self.subscribers.setdefault(user_id, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            streams = self.subscribers.get(subscriber.user_id, set())
+            streams.discard(subscriber)
+            if not streams:
+                self.subscribers.pop(subscriber.user_id, None)
+
+    def has_subscribers(self):
+        return bool(self.subscribers)
+
+    def publish(self, user_ids, message):
+        with self.lock:
+            targets = [
+                subscriber
+                for user_id in user_ids
+                for subscriber in self.subscribers.get(user_id, ())
+            ]
+        for subscriber in targets:
+            subscriber.loop.call_soon_threadsafe(
+                subscriber.deliver, message
+            )
+
+
+broker = import_string(settings.NOTIFICATIONS_BROKER)()
+
+
+def make_stream_ticket(user):
+    return signing.dumps({'user': user.pk}, salt=STREAM_TICKET_SALT)
+
+
+def stream_ticket_user(ticket):
+    """Active user a stream ticket was issued to, None if it is not valid.
+
+    Tickets expire after STREAM_TICKET_MAX_AGE seconds, so the ones that
+    end up in access logs as part of the stream URL are of no use.
+    """
+    try:
+        user_id = signing.loads(
+            ticket, salt=STREAM_TICKET_SALT, max_age=STREAM_TICKET_MAX_AGE
+        )['user']
+    except (signing.BadSignature, KeyError, TypeError):
+        return None
+    return CustomUser.objects.filter(pk=user_id, is_active=True).first()
+
+
+def notify_followers(recipes):
+    """Tell the followers of the authors about newly published recipes."""
+    if not broker.has_subscribers():
+        return
+    followers = {}
+    for author_id, user_id in Subscription.objects.filter(
+        author_id__in={recipe.author_id for recipe in recipes}
+    ).values_list('author_id', 'user_id').iterator():
+        followers.setdefault(author_id, []).append(user_id)
+    for recipe in recipes:
+        broker.publish(followers.get(recipe.author_id, ()), {
+            'id': recipe.id,
+            'name': recipe.name,
+            'author': recipe.author_id,
+        })
+
+
+async def event_stream(user_id):
+    """Server-sent events for user_id, with keep-alive comments.
+
+    The subscription is made on the first iteration, so a response that
+    is never iterated leaves nothing behind.
+    """
+    subscriber = broker.subscribe(user_id)
+    try:
+        yield b'retry: 10000\n\n'
+        while True:
+            try:
+                message = await asyncio.wait_for(
+                    subscriber.queue.get(), NOTIFICATION_KEEPALIVE
+                )
+            except asyncio.TimeoutError:
+                yield b': keep-alive\n\n'
+                continue
+            yield b'event: recipe\ndata: ' + orjson.dumps(message) + b'\n\n'
+    finally:
+        broker.unsubscribe(subscriber)
@@ -1,8 +1,115 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+from rest_framework.pagination import (
+    LimitOffsetPagination, PageNumberPagination
+)
 from rest_framework.response import Response
 
+from .caching import filter_signature
+from .constants import COUNT_CACHE_TTL, ESTIMATED_COUNT_THRESHOLD
+from .metrics import record_cache
+
+
+def estimated_count(queryset, threshold=ESTIMATED_COUNT_THRESHOLD):
+    """Planner row estimate of an unfiltered PostgreSQL queryset.
+
+    Returns None for filtered querysets, other databases and tables
+    smaller than threshold, where an exact COUNT(*) is cheap enough.
+    """
+    connection = connections[queryset.db]
+    query = queryset.query
+    if (connection.vendor != 'postgresql' or query.where
+            or query.distinct or query.low_mark or query.high_mark):
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+            [queryset.model._meta.db_table]
+        )
+        row = cursor.fetchone()
+    if row is None or row[0] < threshold:
+        return None
+    return int(row[0])
+
+
+def planned_count(queryset):
+    """Row estimate of the PostgreSQL plan of a filtered queryset."""
+    if connections[queryset.db].vendor != 'postgresql':
+        return None
+    plan = json.loads(queryset.explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class CountStrategyMixin:
+    """Count pages without running COUNT(*) on every request.
+
+    Unfiltered tables above ESTIMATED_COUNT_THRESHOLD rows are counted
+    from pg_class, other counts are cached per filter signature until
+    the data version changes. With ?exact_count=false every PostgreSQL
+    count is an estimate from pg_class or the query plan.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.view = view
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_count(self, queryset):
+        if not isinstance(queryset, QuerySet):
+            return len(queryset)
+        exact = self.request.query_params.get(
+            'exact_count', ''
+        ).lower() not in ('false', '0')
+        count = estimated_count(
+            queryset, ESTIMATED_COUNT_THRESHOLD if exact else 0
+        )
+        if count is None and not exact:
+            count = planned_count(queryset)
+        if count is not None:
+            return count
+        key = filter_signature(
+            self.request, f'count:{self.request.path}',
+            per_user=getattr(self.view, 'action', None) != 'list'
+        )
+        count = cache.get(key)
+        record_cache('count', count is not None)
+        if count is None:
+            count = queryset.count()
+            cache.set(key, count, COUNT_CACHE_TTL)
+        return count
+
+    def django_paginator_class(self, object_list, per_page):
+        paginator = Paginator(object_list, per_page)
+        paginator.count = self.get_count(object_list)
+        return paginator
+
+
+class CountedLimitOffsetPagination(
+    CountStrategyMixin, LimitOffsetPagination
+):
+    pass
+
+
+class CountedPageNumberPagination(
+    CountStrategyMixin, PageNumberPagination
+):
+    pass
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator counting large unfiltered tables from the planner."""
+
+    @cached_property
+    def count(self):
+        estimate = estimated_count(self.object_list)
+        return super().count if estimate is None else estimate
+
 
-class SubscriptionPagination(PageNumberPagination):
+class SubscriptionPagination(CountedPageNumberPagination):
     page_size = 6
     page_size_query_param = 'limit'
     max_page_size = 100
@@ -14,7 +121,7 @@ class SubscriptionPagination(PageNumberPagination):
         return response
 
 
-class RecipePagination(PageNumberPagination):
+class RecipePagination(CountedPageNumberPagination):
     page_size = 6
     page_size_query_param = 'limit'
     max_page_size = 100
@@ -0,0 +1,193 @@
+import cProfile
+import hashlib
+import pstats
+import time
+import uuid
+from pathlib import Path
+
+import orjson
+from asgiref.sync import (
+    async_to_sync, iscoroutinefunction, markcoroutinefunction, sync_to_async
+)
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import cache
+from django.db import connection
+from django.http import HttpResponse
+
+PROFILING_SALT = 'api.profiling'
+TOP_FUNCTIONS = 30
+TREE_DEPTH = 12
+TREE_MIN_SHARE = 0.01
+STAFF_CACHE_TTL = 60
+
+
+def make_profiling_token(user):
+    return signing.dumps({'user': user.pk}, salt=PROFILING_SALT)
+
+
+def profiling_user_id(token):
+    """Id of the staff user that signed token, None if it is not valid.
+
+    Only tokens with a valid signature reach the database, and the staff
+    check of a token is cached for STAFF_CACHE_TTL seconds, as one token
+    usually profiles a series of requests.
+    """
+    try:
+        user_id = signing.loads(
+            token, salt=PROFILING_SALT,
+            max_age=settings.PROFILING['TOKEN_MAX_AGE']
+        )['user']
+    except (signing.BadSignature, KeyError, TypeError):
+        return None
+    key = 'profiling:staff:' + hashlib.sha256(token.encode()).hexdigest()
+    is_staff = cache.get(key)
+    if is_staff is None:
+        is_staff = get_user_model().objects.filter(
+            pk=user_id, is_staff=True, is_active=True
+        ).exists()
+        cache.set(key, is_staff, STAFF_CACHE_TTL)
+    return user_id if is_staff else None
+
+
+def function_name(function):
+    filename, line, name = function
+    return f'{filename}:{line}({name})'
+
+
+def call_tree(stats, root, total):
+    """Nested callees of root, cut at TREE_MIN_SHARE of total time."""
+    callees = {}
+    for function, (_, _, _, _, callers) in stats.items():
+        for caller, (_, calls, _, cumulative) in callers.items():
+            callees.setdefault(caller, []).append(
+                (cumulative, calls, function)
+            )
+
+    def build(function, cumulative, calls, depth, path):
+        node = {
+            'function': function_name(function),
+            'calls': calls,
+            'cumulative_time': round(cumulative, 6),
+            'children': [],
+        }
+        if depth == TREE_DEPTH:
+            return node
+        for child_time, child_calls, child in sorted(
+            callees.get(function, ()), key=lambda item: -item[0]
+        ):
+            if child_time < total * TREE_MIN_SHARE or child in path:
+                continue
+            node['children'].append(build(
+                child, child_time, child_calls, depth + 1, path | {child}
+            ))
+        return node
+
+    _, calls, _, cumulative, _ = stats[root]
+    return build(root, cumulative, calls, 0, {root})
+
+
+def build_report(request, response, profile, queries, duration):
+    stats = pstats.Stats(profile).stats
+    root = max(stats, key=lambda function: stats[function][3])
+    total = stats[root][3] or 1
+    top = sorted(stats.items(), key=lambda item: -item[1][3])[:TOP_FUNCTIONS]
+    return {
+        'method': request.method,
+        'path': request.get_full_path(),
+        'status': response.status_code,
+        'duration_ms': round(duration * 1000, 3),
+        'query_count': len(queries),
+        'query_time_ms': round(
+            sum(float(query['time']) for query in queries) * 1000, 3
+        ),
+        'queries': queries,
+        'top_functions': [
+            {
+                'function': function_name(function),
+                'calls': calls,
+                'total_time': round(total_time, 6),
+                'cumulative_time': round(cumulative, 6),
+            }
+            for function, (_, calls, total_time, cumulative, _) in top
+        ],
+        'call_tree': call_tree(stats, root, total),
+    }
+
+
+class ProfilingMiddleware:
+    """Profile single requests of staff users on demand.
+
+    A request is profiled when it carries a token from
+    `manage.py profiling_token` in the X-Profile header; tokens are not
+    accepted in the query string, which ends up in logs and Referer
+    headers. Other requests only pay for the header lookup. The cProfile
+    dump and a JSON report with the top functions, the call tree and the
+    SQL queries are written to PROFILING['DIRECTORY'] and named in the
+    X-Profile-Id header; with X-Profile-Report: 1 or _profile_report=1
+    the report replaces the response body.
+
+    Under ASGI a profiled request is handled from a thread of its own,
+    which its synchronous views and queries run in as well, so they are
+    profiled; coroutines running on the event loop are not.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        token = request.headers.get('X-Profile')
+        if token is None or profiling_user_id(token) is None:
+            return self.get_response(request)
+        return self.profile(request, self.get_response)
+
+    async def __acall__(self, request):
+        token = request.headers.get('X-Profile')
+        if token is None or await sync_to_async(profiling_user_id)(
+            token
+        ) is None:
+            return await self.get_response(request)
+        # Synchronous code below async_to_sync runs in the calling thread,
+        # the one the profiler is enabled in.
+        return await sync_to_async(self.profile)(
+            request, async_to_sync(self.get_response)
+        )
+
+    def profile(self, request, get_response):
+        # django.test pulls in the test client, load it only when needed.
+        from django.test.utils import CaptureQueriesContext
+
+        profile = cProfile.Profile()
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            profile.enable()
+            try:
+                response = get_response(request)
+            finally:
+                profile.disable()
+        duration = time.perf_counter() - started
+        report = build_report(
+            request, response, profile, queries.captured_queries, duration
+        )
+        profile_id = f'{time.strftime("%Y%m%d-%H%M%S")}-{uuid.uuid4().hex[:8]}'
+        directory = Path(settings.PROFILING['DIRECTORY'])
+        directory.mkdir(parents=True, exist_ok=True)
+        profile.dump_stats(directory / f'{profile_id}.prof')
+        body = orjson.dumps(report, option=orjson.OPT_INDENT_2)
+        (directory / f'{profile_id}.json').write_bytes(body)
+        if '1' in (
+            request.headers.get('X-Profile-Report'),
+            request.GET.get('_profile_report'),
+        ):
+            response = HttpResponse(body, content_type='application/json')
+        response['X-Profile-Id'] = profile_id
+        return response
@@ -0,0 +1,133 @@
+import math
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .constants import (
+    FAVORITE_WEIGHT, POPULARITY_HALF_LIFE_DAYS, SHOPPING_CART_WEIGHT
+)
+from .models import (
+    FavoriteRecipe, PopularityEpoch, PopularityEvent, Recipe, ShoppingCart
+)
+
+INITIAL_EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+DECAY_RATE = math.log(2) / (POPULARITY_HALF_LIFE_DAYS * 24 * 60 * 60)
+# Scores grow by 2 ** 32 at most before the epoch is moved forward.
+REBASE_AFTER = timedelta(days=POPULARITY_HALF_LIFE_DAYS * 32)
+SOURCES = {
+    FavoriteRecipe: FAVORITE_WEIGHT,
+    ShoppingCart: SHOPPING_CART_WEIGHT,
+}
+
+
+def event_score(weight, created_at, epoch):
+    """Contribution of one event, scaled to epoch (forward decay).
+
+    All stored scores decay by the same factor as time passes, so the
+    order of Recipe.popularity is the order of the time-decayed scores
+    and old scores only have to be rewritten when the epoch moves.
+    """
+    return weight * math.exp(
+        DECAY_RATE * (created_at - epoch).total_seconds()
+    )
+
+
+def log_popularity_event(instance, sign):
+    """Queue the addition (sign 1) or removal (-1) of a favorite or cart row.
+
+    The event is written in the transaction of the change, so it exists
+    exactly when the change is committed.
+    """
+    PopularityEvent.objects.create(
+        recipe_id=instance.recipe_id,
+        weight=SOURCES[type(instance)] * sign,
+        created_at=instance.created_at,
+    )
+
+
+def lock_epoch(now=None):
+    """Lock and return the epoch of the stored scores.
+
+    Moves the epoch to now and rescales all scores once it is older than
+    REBASE_AFTER, so they never overflow. Must run in a transaction; the
+    lock also keeps concurrent refreshes from interleaving.
+    """
+    epoch, _ = PopularityEpoch.objects.select_for_update().get_or_create(
+        pk=1, defaults={'started_at': INITIAL_EPOCH}
+    )
+    now = now or timezone.now()
+    if now - epoch.started_at > REBASE_AFTER:
+        decay = math.exp(
+            -DECAY_RATE * (now - epoch.started_at).total_seconds()
+        )
+        Recipe.objects.exclude(popularity=0).update(
+            popularity=F('popularity') * decay
+        )
+        epoch.started_at = now
+        epoch.save(update_fields=['started_at'])
+    return epoch.started_at
+
+
+def refresh_popularity(batch_size=1000, now=None):
+    """Add queued favorite and cart events to the popularity scores.
+
+    Events are applied in batches of batch_size and deleted in the same
+    transaction as the score update. An event committed after a later one
+    has been applied is still in the queue, so none is skipped.
+    """
+    processed = 0
+    while True:
+        with transaction.atomic():
+            epoch = lock_epoch(now)
+            events = list(PopularityEvent.objects.order_by('id').values_list(
+                'id', 'recipe_id', 'weight', 'created_at'
+            )[:batch_size])
+            if not events:
+                break
+            increments = defaultdict(float)
+            for _, recipe_id, weight, created_at in events:
+                increments[recipe_id] += event_score(
+                    weight, created_at, epoch
+                )
+            Recipe.objects.bulk_update([
+                Recipe(id=recipe_id, popularity=F('popularity') + score)
+                for recipe_id, score in increments.items()
+            ], ['popularity'])
+            PopularityEvent.objects.filter(
+                id__in=[event[0] for event in events]
+            ).delete()
+        processed += len(events)
+    return processed
+
+
+def rebuild_popularity(batch_size=1000):
+    """Recompute all scores from the favorite and cart rows that exist.
+
+    For rows written without signals, e.g. by bulk loads. Writes to the
+    source tables wait until the rebuild is committed.
+    """
+    with transaction.atomic():
+        epoch = lock_epoch()
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'LOCK TABLE {} IN SHARE MODE'.format(', '.join(
+                        model._meta.db_table for model in SOURCES
+                    ))
+                )
+        scores = defaultdict(float)
+        for model, weight in SOURCES.items():
+            for recipe_id, created_at in model.objects.values_list(
+                'recipe_id', 'created_at'
+            ).iterator(chunk_size=batch_size):
+                scores[recipe_id] += event_score(weight, created_at, epoch)
+        PopularityEvent.objects.all().delete()
+        Recipe.objects.exclude(popularity=0).update(popularity=0)
+        Recipe.objects.bulk_update([
+            Recipe(id=recipe_id, popularity=score)
+            for recipe_id, score in scores.items()
+        ], ['popularity'], batch_size=batch_size)
+    return len(scores)
@@ -0,0 +1,269 @@
+import heapq
+import math
+import threading
+from collections import Counter
+from array import array
+from bisect import bisect_left, insort
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Max, Min, Q
+from django.utils import timezone
+
+from .constants import MAX_TAGS, RECIPE_CHANGE_OVERLAP, SIMILAR_MAX_POSTING
+from .models import Recipe, RecipeChange, RecipeIngredient
+
+
+def log_recipe_changes(recipe_ids):
+    """Append recipes to the change log once the transaction commits.
+
+    Writing after commit keeps readers from seeing a change before the
+    ingredients and tags saved in the same transaction.
+    """
+    recipe_ids = list(recipe_ids)
+    transaction.on_commit(lambda: RecipeChange.objects.bulk_create(
+        RecipeChange(recipe_id=recipe_id) for recipe_id in recipe_ids
+    ))
+
+
+def prune_recipe_changes(older_than):
+    """Delete change log rows created before older_than.
+
+    The newest of them is kept as a marker, so the log never runs empty
+    and a reader positioned before it can tell it missed changes.
+    """
+    boundary = RecipeChange.objects.filter(
+        created_at__lt=older_than
+    ).aggregate(boundary=Max('id'))['boundary']
+    if boundary is None:
+        return 0
+    deleted, _ = RecipeChange.objects.filter(id__lt=boundary).delete()
+    return deleted
+
+
+def changes_pruned(change_id):
+    """True when changes logged after change_id may have been pruned."""
+    oldest = RecipeChange.objects.aggregate(oldest=Min('id'))['oldest']
+    return oldest is not None and change_id < oldest - 1
+
+
+def tag_feature(bit):
+    """Feature id of a tag bit; ingredient features use positive ids."""
+    return -(bit + 1)
+
+
+def contains(posting, recipe_id):
+    """Whether the sorted posting holds recipe_id."""
+    place = bisect_left(posting, recipe_id)
+    return place < len(posting) and posting[place] == recipe_id
+
+
+class RecipeIndex:
+    """In-process inverted index over recipe ingredients and tags.
+
+    Every recipe is a sparse set of features (ingredient ids and tag
+    bits), every feature keeps a sorted array of recipe ids. The index is
+    built once per process and then follows the RecipeChange log, so only
+    the recipes changed since the last sync are reloaded.
+
+    Change ids are allocated before their rows commit, so a sync also
+    rereads the rows of the last RECIPE_CHANGE_OVERLAP seconds and
+    applies the ones it has not seen. Database reads run outside the
+    lock; a thread that finds another one syncing serves the current
+    state instead of waiting, except before the first build.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sync_lock = threading.Lock()
+        self.version = None
+        self.synced_at = None
+        self.features = {}
+        self.postings = {}
+        self.ingredient_counts = {}
+        self._similar = {}
+        self._recent = {}
+
+    def sync(self):
+        if not self.sync_lock.acquire(blocking=self.version is None):
+            return
+        try:
+            if self.version is None or changes_pruned(self.version):
+                self._build()
+            else:
+                self._apply_changes()
+        finally:
+            self.sync_lock.release()
+
+    def reset(self):
+        with self.sync_lock, self.lock:
+            self.version = None
+            self.synced_at = None
+            self.features = {}
+            self.postings = {}
+            self.ingredient_counts = {}
+            self._similar = {}
+            self._recent = {}
+
+    @staticmethod
+    def _load_features(recipe_ids=None):
+        recipes = Recipe.objects.all()
+        ingredients = RecipeIngredient.objects.all()
+        if recipe_ids is not None:
+            recipes = recipes.filter(id__in=recipe_ids)
+            ingredients = ingredients.filter(recipe_id__in=recipe_ids)
+        features = {}
+        for recipe_id, mask in recipes.values_list('id', 'tags_mask'):
+            features[recipe_id] = [
+                tag_feature(bit) for bit in range(MAX_TAGS)
+                if mask >> bit & 1
+            ]
+        for recipe_id, ingredient_id in ingredients.values_list(
+            'recipe_id', 'ingredient_id'
+        ):
+            if recipe_id in features:
+                features[recipe_id].append(ingredient_id)
+        return features
+
+    def _build(self):
+        synced_at = timezone.now()
+        version = RecipeChange.objects.aggregate(
+            version=Max('id')
+        )['version'] or 0
+        postings = {}
+        features = {}
+        ingredient_counts = {}
+        for recipe_id, recipe_features in sorted(
+            self._load_features().items()
+        ):
+            features[recipe_id] = tuple(set(recipe_features))
+            ingredient_counts[recipe_id] = sum(
+                feature > 0 for feature in features[recipe_id]
+            )
+            for feature in features[recipe_id]:
+                postings.setdefault(feature, array('q')).append(recipe_id)
+        with self.lock:
+            self.features = features
+            self.postings = postings
+            self.ingredient_counts = ingredient_counts
+            self._similar = {}
+            # Rows of the overlap may have committed after the features
+            # were read, the next sync applies them once more.
+            self._recent = {}
+            self.version = version
+            self.synced_at = synced_at
+
+    def _apply_changes(self):
+        synced_at = timezone.now()
+        overlap_start = self.synced_at - timedelta(
+            seconds=RECIPE_CHANGE_OVERLAP
+        )
+        changes = [
+            change for change in RecipeChange.objects.filter(
+                Q(id__gt=self.version) | Q(created_at__gte=overlap_start)
+            ).values_list('id', 'recipe_id', 'created_at')
+            if change[0] not in self._recent
+        ]
+        recipe_ids = {recipe_id for _, recipe_id, _ in changes}
+        fresh = self._load_features(recipe_ids) if recipe_ids else {}
+        with self.lock:
+            for recipe_id in recipe_ids:
+                self._remove(recipe_id)
+                if recipe_id in fresh:
+                    self._add(recipe_id, fresh[recipe_id])
+            if recipe_ids:
+                self._similar = {}
+            self._recent = {
+                change_id: created_at
+                for change_id, created_at in self._recent.items()
+                if created_at >= overlap_start
+            }
+            for change_id, _, created_at in changes:
+                self._recent[change_id] = created_at
+                self.version = max(self.version, change_id)
+            self.synced_at = synced_at
+
+    def _add(self, recipe_id, recipe_features):
+        self.features[recipe_id] = tuple(set(recipe_features))
+        self.ingredient_counts[recipe_id] = sum(
+            feature > 0 for feature in self.features[recipe_id]
+        )
+        for feature in self.features[recipe_id]:
+            insort(self.postings.setdefault(feature, array('q')), recipe_id)
+
+    def _remove(self, recipe_id):
+        self.ingredient_counts.pop(recipe_id, None)
+        for feature in self.features.pop(recipe_id, ()):
+            posting = self.postings[feature]
+            del posting[bisect_left(posting, recipe_id)]
+            if not posting:
+                del self.postings[feature]
+
+    def __contains__(self, recipe_id):
+        return recipe_id in self.features
+
+    def similar(self, recipe_id, limit):
+        """Ids of the recipes sharing the most ingredients and tags.
+
+        Shared features are weighted by inverse document frequency, so a
+        rare ingredient counts for more than salt, and the sum is divided
+        by the square root of the candidate size to keep recipes with
+        everything in them from winning every list. Features present in
+        more than SIMILAR_MAX_POSTING recipes carry almost no weight and
+        are skipped to bound the work per request.
+        """
+        with self.lock:
+            cached_limit, cached = self._similar.get(recipe_id, (0, None))
+            if cached is not None and cached_limit >= limit:
+                return cached[:limit]
+            total = len(self.features)
+            scores = {}
+            for feature in self.features.get(recipe_id, ()):
+                posting = self.postings[feature]
+                if len(posting) > SIMILAR_MAX_POSTING:
+                    continue
+                weight = math.log(1 + total / len(posting))
+                for other in posting:
+                    scores[other] = scores.get(other, 0) + weight
+            scores.pop(recipe_id, None)
+            best = heapq.nlargest(limit, scores.items(), key=lambda item: (
+                item[1] / math.sqrt(len(self.features[item[0]])), item[0]
+            ))
+            result = [other for other, _ in best]
+            self._similar[recipe_id] = (limit, result)
+            return result
+
+    def cookable(self, ingredient_ids, max_missing=0):
+        """(recipe_id, missing) pairs of recipes cookable from ingredients.
+
+        The posting lists of the available ingredients are counted
+        together, so a recipe's count is the size of its intersection with
+        the available set and the rest of its ingredients are missing.
+        Recipes missing fewer ingredients come first, then recipes using
+        more of the available ones, then newer ones. Postings longer than
+        SIMILAR_MAX_POSTING (salt, water) are not walked: they only count
+        for recipes found through the other ingredients, so a recipe made
+        of such ingredients alone is not listed.
+        """
+        with self.lock:
+            hits = Counter()
+            common = []
+            for ingredient_id in set(ingredient_ids):
+                posting = self.postings.get(ingredient_id, ())
+                if len(posting) > SIMILAR_MAX_POSTING:
+                    common.append(posting)
+                else:
+                    hits.update(posting)
+            matches = []
+            for recipe_id, count in hits.items():
+                count += sum(
+                    contains(posting, recipe_id) for posting in common
+                )
+                missing = self.ingredient_counts[recipe_id] - count
+                if missing <= max_missing:
+                    matches.append((missing, -count, -recipe_id))
+        matches.sort()
+        return [(-recipe_id, missing) for missing, _, recipe_id in matches]
+
+
+recipe_index = RecipeIndex()
@@ -1,19 +1,28 @@
 import re
 
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from drf_base64.fields import Base64ImageField
 from rest_framework import serializers
 
+from .caching import bump_data_version
+from .media import delete_files
 from .models import (
-    Ingredient, Recipe, RecipeIngredient, Tag,
+    Ingredient, Recipe, RecipeIngredient, Tag, TagRecipe,
     Subscription, ShoppingCart, FavoriteRecipe
 )
-from .mixins import SubscriptionMixin, FavoriteShoppingCartMixin
+from .mixins import (
+    SubscriptionMixin, FavoriteShoppingCartMixin, SparseFieldsMixin
+)
+from .notifications import notify_followers
+from .recipe_index import log_recipe_changes
 
 CustomUser = get_user_model()
 
 
-class CustomUserSerializer(SubscriptionMixin, serializers.ModelSerializer):
+class CustomUserSerializer(
+    SparseFieldsMixin, SubscriptionMixin, serializers.ModelSerializer
+):
     is_subscribed = serializers.SerializerMethodField()
     avatar = serializers.SerializerMethodField()
 
@@ -112,18 +121,22 @@ class SubscriptionSerializer(SubscriptionMixin, serializers.ModelSerializer):
         )
 
     def get_recipes(self, obj):
-        recipes = obj.author.recipes.all()
-        recipes_limit = self.context.get('recipes_limit')
-        if recipes_limit:
-            recipes = recipes[:int(recipes_limit)]
+        recipes = getattr(obj.author, 'recipes_preview', None)
+        if recipes is None:
+            recipes = obj.author.recipes.all()
+            recipes_limit = self.context.get('recipes_limit')
+            if recipes_limit:
+                recipes = recipes[:int(recipes_limit)]
         return RecipeMinifiedSerializer(recipes, many=True).data
 
     def get_recipes_count(self, obj):
+        if hasattr(obj, 'recipes_count'):
+            return obj.recipes_count
         return obj.author.recipes.count()
 
     def get_avatar(self, obj):
         if obj.author.avatar:
-            return self.context['request'].build_absolute_url(
+            return self.context['request'].build_absolute_uri(
                 obj.author.avatar.url
             )
         return None
@@ -193,8 +206,18 @@ class RecipeMinifiedSerializer(serializers.ModelSerializer):
 
 
 class RecipeListSerializer(
-    FavoriteShoppingCartMixin, serializers.ModelSerializer
+    SparseFieldsMixin, FavoriteShoppingCartMixin, serializers.ModelSerializer
 ):
+    collapsed_fields = {
+        'tags': serializers.PrimaryKeyRelatedField(
+            many=True, read_only=True
+        ),
+        'author': serializers.PrimaryKeyRelatedField(read_only=True),
+        'ingredients': serializers.SlugRelatedField(
+            source='recipeingredient_set', slug_field='ingredient_id',
+            many=True, read_only=True
+        ),
+    }
     tags = TagSerializer(many=True, read_only=True)
     author = CustomUserSerializer(read_only=True)
     ingredients = IngredientInRecipeSerializer(
@@ -217,10 +240,27 @@ class RecipeListSerializer(
         )
 
 
+class TagPrimaryKeyField(serializers.PrimaryKeyRelatedField):
+    """Tag id field reading tags preloaded into context['tags_by_id']."""
+
+    def to_internal_value(self, data):
+        tags_by_id = self.context.get('tags_by_id')
+        if tags_by_id is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return tags_by_id[int(data)]
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+
+
 class RecipeSerializer(
     FavoriteShoppingCartMixin, serializers.ModelSerializer
 ):
-    tags = serializers.PrimaryKeyRelatedField(
+    tags = TagPrimaryKeyField(
         many=True,
         queryset=Tag.objects.all()
     )
@@ -290,10 +330,6 @@ class RecipeSerializer(
                         f'with ID {ingredient_id}.'
                     )
                 seen_ids.add(ingredient_id)
-                if not Ingredient.objects.filter(id=ingredient_id).exists():
-                    raise serializers.ValidationError(
-                        f'Ingredient with id {ingredient_id} does not exist.'
-                    )
                 if amount <= 0:
                     raise serializers.ValidationError(
                         'The quantity must be a positive integer.'
@@ -308,6 +344,16 @@ class RecipeSerializer(
                 raise serializers.ValidationError(
                     'ID and amount must be positive integers.'
                 )
+        known_ids = self.context.get('ingredient_ids')
+        if known_ids is None:
+            known_ids = set(Ingredient.objects.filter(
+                id__in=seen_ids
+            ).values_list('id', flat=True))
+        for ingredient in validated_ingredients:
+            if ingredient['id'] not in known_ids:
+                raise serializers.ValidationError(
+                    f'Ingredient with id {ingredient["id"]} does not exist.'
+                )
         return validated_ingredients
 
     def validate_tags(self, value):
@@ -338,20 +384,65 @@ class RecipeSerializer(
             for ingredient in ingredients_data
         ])
 
+    @transaction.atomic
     def create(self, validated_data):
         validated_data['author'] = self.context['request'].user
         ingredients_data = validated_data.pop('ingredients')
         tags_data = validated_data.pop('tags')
-        recipe = Recipe.objects.create(**validated_data)
+        recipe = Recipe.objects.create(
+            tags_mask=Tag.mask_for(tags_data), **validated_data
+        )
         recipe.tags.set(tags_data)
         self._create_recipe_ingredients(recipe, ingredients_data)
         return recipe
 
+    @staticmethod
+    @transaction.atomic
+    def create_many(items, author):
+        """Create recipes from validated data with one INSERT per table.
+
+        bulk_create sends no signals, so the change log, the data
+        version and the followers' notifications are handled here.
+        """
+        recipes = Recipe.objects.bulk_create([
+            Recipe(
+                author=author, tags_mask=Tag.mask_for(item['tags']),
+                **{
+                    field: value for field, value in item.items()
+                    if field not in ('tags', 'ingredients')
+                }
+            )
+            for item in items
+        ])
+        TagRecipe.objects.bulk_create([
+            TagRecipe(recipe=recipe, tag=tag)
+            for recipe, item in zip(recipes, items)
+            for tag in item['tags']
+        ])
+        RecipeIngredient.objects.bulk_create([
+            RecipeIngredient(
+                recipe=recipe,
+                ingredient_id=ingredient['id'],
+                amount=ingredient['amount']
+            )
+            for recipe, item in zip(recipes, items)
+            for ingredient in item['ingredients']
+        ])
+        log_recipe_changes(recipe.id for recipe in recipes)
+        bump_data_version()
+        transaction.on_commit(lambda: notify_followers(recipes))
+        return recipes
+
+    @transaction.atomic
     def update(self, instance, validated_data):
         if 'author' in validated_data:
             validated_data.pop('author')
         ingredients_data = validated_data.pop('ingredients', None)
         tags_data = validated_data.pop('tags', None)
+        if tags_data is not None:
+            instance.tags_mask = Tag.mask_for(tags_data)
+        if 'image' in validated_data:
+            delete_files(instance.image)
         instance = super().update(instance, validated_data)
         if tags_data is not None:
             instance.tags.set(tags_data)
@@ -0,0 +1,109 @@
+from django.contrib.auth import user_logged_out
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import token_cache
+from .caching import bump_data_version, bump_reference_version
+from .media import delete_files
+from .models import (
+    CustomUser, FavoriteRecipe, Ingredient, Recipe, ShoppingCart,
+    Subscription, Tag
+)
+from .notifications import notify_followers
+from .ranking import log_popularity_event
+from .recipe_index import log_recipe_changes
+
+
+@receiver(pre_delete, sender=Tag)
+def clear_tag_bit(sender, instance, **kwargs):
+    """Free the bit of a deleted tag so a new tag can reuse it."""
+    recipes = Recipe.objects.alias(
+        matched_tags=F('tags_mask').bitand(instance.mask)
+    ).filter(matched_tags__gt=0)
+    recipe_ids = list(recipes.values_list('id', flat=True))
+    recipes.update(tags_mask=F('tags_mask') - instance.mask)
+    log_recipe_changes(recipe_ids)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def log_recipe_change(sender, instance, **kwargs):
+    log_recipe_changes([instance.pk])
+
+
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(sender, instance, **kwargs):
+    token_cache.invalidate(instance.key)
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+@receiver(user_logged_out)
+def forget_user_tokens(sender, instance=None, user=None, **kwargs):
+    """Drop cached snapshots on logout and on any change of the user."""
+    user = user or instance
+    if user is not None:
+        token_cache.invalidate_user(user.pk)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+@receiver(post_save, sender=FavoriteRecipe)
+@receiver(post_delete, sender=FavoriteRecipe)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_delete, sender=ShoppingCart)
+@receiver(post_save, sender=Subscription)
+@receiver(post_delete, sender=Subscription)
+@receiver(post_delete, sender=CustomUser)
+def change_data_version(sender, **kwargs):
+    bump_data_version()
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def change_reference_version(sender, **kwargs):
+    bump_reference_version()
+
+
+@receiver(post_save, sender=CustomUser)
+def count_new_user(sender, created, **kwargs):
+    if created:
+        bump_data_version()
+
+
+@receiver(post_delete, sender=Recipe)
+def delete_recipe_image(sender, instance, **kwargs):
+    delete_files(instance.image)
+
+
+@receiver(post_delete, sender=CustomUser)
+def delete_user_avatar(sender, instance, **kwargs):
+    delete_files(instance.avatar)
+
+
+@receiver(post_save, sender=Recipe)
+def announce_recipe(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: notify_followers([instance]))
+
+
+@receiver(post_save, sender=FavoriteRecipe)
+@receiver(post_save, sender=ShoppingCart)
+def add_popularity_event(sender, instance, created, **kwargs):
+    if created:
+        log_popularity_event(instance, 1)
+
+
+@receiver(post_delete, sender=FavoriteRecipe)
+@receiver(post_delete, sender=ShoppingCart)
+def remove_popularity_event(sender, instance, **kwargs):
+    log_popularity_event(instance, -1)
@@ -0,0 +1,68 @@
+import hashlib
+import os
+import posixpath
+import tempfile
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """File system storage naming files by the SHA-256 of their content.
+
+    An upload to recipes/ is stored as recipes/<2 hex>/<sha256>.<ext>, so
+    equal uploads share one file and a name never changes its content:
+    nginx can serve these URLs with an immutable Cache-Control header.
+    Shared files are only deleted once no row references them, see
+    api.media.delete_files. Reusing a file touches it, so a deletion
+    queued before the new row is committed keeps it.
+
+    Files are written under a temporary name and linked into place, so
+    a file is never seen half-written and of two concurrent equal
+    uploads the second one finds the first file instead of renaming its
+    own.
+    """
+
+    def save(self, name, content, max_length=None):
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        digest = digest.hexdigest()
+        directory, filename = posixpath.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        name = posixpath.join(directory, digest[:2], digest + extension)
+        try:
+            os.utime(self.path(name))
+        except FileNotFoundError:
+            return super().save(name, content, max_length)
+        return name
+
+    def get_available_name(self, name, max_length=None):
+        # The name is the content hash, an existing file is the same file.
+        return name
+
+    def _save(self, name, content):
+        full_path = self.path(name)
+        directory = os.path.dirname(full_path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temporary = tempfile.mkstemp(dir=directory, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                for chunk in content.chunks():
+                    file.write(chunk)
+            os.chmod(temporary, self.file_permissions_mode or 0o644)
+            try:
+                os.link(temporary, full_path)
+            except FileExistsError:
+                # Stored by a concurrent upload of the same content.
+                os.utime(full_path)
+        finally:
+            os.unlink(temporary)
+        return name
+
+
+content_storage = ContentAddressedStorage()
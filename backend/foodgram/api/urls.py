@@ -3,7 +3,7 @@ from rest_framework.routers import DefaultRouter
 
 from .views import (
     IngredientViewSet, RecipeViewSet,
-    TagViewSet, CustomUserViewSet,
+    TagViewSet, CustomUserViewSet, notification_stream, notification_ticket,
 )
 
 router = DefaultRouter()
@@ -21,6 +21,14 @@ router.register(
 )
 
 urlpatterns = [
+    path(
+        'notifications/ticket/', notification_ticket,
+        name='notification-ticket'
+    ),
+    path(
+        'notifications/stream/', notification_stream,
+        name='notification-stream'
+    ),
     path(
         r'users/subscriptions/', CustomUserViewSet.as_view(
             {'get': 'subscriptions'}
@@ -1,24 +1,53 @@
 import base64
 import hashlib
 
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from django.db.models import Sum
+from django.core.cache import cache
+from django.db.models import (
+    Count, Exists, OuterRef, Prefetch, Q, Sum, Value
+)
 from django.contrib.auth import get_user_model
-from django.http import HttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.http import (
+    Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+)
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, permissions, status, viewsets
-from rest_framework.decorators import action
+from rest_framework.decorators import (
+    action, api_view, permission_classes
+)
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.response import Response
-from rest_framework.pagination import PageNumberPagination
 
-from .paginators import RecipePagination, SubscriptionPagination
+from .authentication import CachedTokenAuthentication
+from .caching import filter_signature, get_reference_data
+from .constants import (
+    FACETS_CACHE_TTL, MAX_BULK_RECIPES, MAX_INGREDIENT_IDS,
+    MAX_MISSING_INGREDIENTS, MAX_RECIPE_IDS, MAX_SIMILAR_LIMIT, SIMILAR_LIMIT
+)
+from .paginators import (
+    CountedPageNumberPagination, RecipePagination, SubscriptionPagination
+)
+from .export import (
+    aiter_ndjson, current_change_id, iter_ndjson, iter_recipes
+)
+from .fast_serializers import RecipeValuesSerializer
 from .filters import RecipeFilter, IngredientFilter
-from .mixins import AddDeleteRecipeMixin, RecipeListActionsMixin
+from .media import delete_files
+from .metrics import record_cache
+from .mixins import (
+    AddDeleteRecipeMixin, FieldSelection, RecipeListActionsMixin
+)
 from .models import (
     Ingredient, Recipe, Tag, Subscription,
     FavoriteRecipe, ShoppingCart, RecipeIngredient
 )
+from .notifications import (
+    event_stream, make_stream_ticket, stream_ticket_user
+)
 from .permissions import IsAuthorOrReadOnly
+from .recipe_index import changes_pruned, recipe_index
 from .serializers import (
     IngredientSerializer, RecipeListSerializer, TagSerializer,
     CustomUserSerializer, SetAvatarResponseSerializer,
@@ -32,7 +61,7 @@ CustomUser = get_user_model()
 class CustomUserViewSet(viewsets.ModelViewSet):
     queryset = CustomUser.objects.all()
     serializer_class = CustomUserSerializer
-    pagination_class = PageNumberPagination
+    pagination_class = CountedPageNumberPagination
 
     def get_permissions(self):
         if self.action in ('create',):
@@ -54,12 +83,22 @@ class CustomUserViewSet(viewsets.ModelViewSet):
         url_path='subscriptions',
     )
     def subscriptions(self, request):
+        recipes_limit = request.query_params.get('recipes_limit')
+        recipes = Recipe.objects.all()
+        if recipes_limit and recipes_limit.isdigit():
+            recipes = recipes[:int(recipes_limit)]
         subscriptions = Subscription.objects.filter(
             user=request.user
-        ).select_related('author')
+        ).select_related('author').annotate(
+            recipes_count=Count('author__recipes')
+        ).prefetch_related(
+            Prefetch(
+                'author__recipes', queryset=recipes,
+                to_attr='recipes_preview'
+            )
+        )
         paginator = SubscriptionPagination()
         page = paginator.paginate_queryset(subscriptions, request)
-        recipes_limit = request.query_params.get('recipes_limit')
         serializer = SubscriptionSerializer(
             page,
             many=True,
@@ -75,6 +114,13 @@ class CustomUserViewSet(viewsets.ModelViewSet):
         url_path='me',
     )
     def me(self, request):
+        if request.method == 'GET':
+            return Response(
+                CustomUserSerializer(
+                    request.user, context={'request': request}
+                ).data,
+                status=status.HTTP_200_OK
+            )
         serializer = CustomUserUpdateSerializer(
             request.user,
             data=request.data,
@@ -94,16 +140,18 @@ class CustomUserViewSet(viewsets.ModelViewSet):
         if request.method == 'PUT':
             serializer = SetAvatarSerializer(data=request.data)
             serializer.is_valid(raise_exception=True)
+            delete_files(user.avatar)
             user.avatar = serializer.validated_data['avatar']
-            user.save()
+            user.save(update_fields=['avatar'])
             return Response(
                 SetAvatarResponseSerializer(
                     {'avatar': user.avatar.url}
                 ).data,
                 status=status.HTTP_200_OK
             )
-        user.avatar.delete() if user.avatar else None
-        user.save()
+        delete_files(user.avatar)
+        user.avatar = None
+        user.save(update_fields=['avatar'])
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(
@@ -159,6 +207,9 @@ class TagViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = [permissions.AllowAny]
     pagination_class = None
 
+    def list(self, request, *args, **kwargs):
+        return Response(get_reference_data(TagSerializer))
+
 
 class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Ingredient.objects.all()
@@ -168,6 +219,15 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     filterset_class = IngredientFilter
     pagination_class = None
 
+    def list(self, request, *args, **kwargs):
+        if not request.query_params.get('name'):
+            return Response(get_reference_data(IngredientSerializer))
+        return Response(list(
+            self.filter_queryset(self.get_queryset()).values(
+                *IngredientSerializer.Meta.fields
+            )
+        ))
+
 
 class RecipeViewSet(
     AddDeleteRecipeMixin, RecipeListActionsMixin, viewsets.ModelViewSet
@@ -185,13 +245,136 @@ class RecipeViewSet(
     ]
     filterset_class = RecipeFilter
     search_fields = ['name', 'text']
-    ordering_fields = ['name', 'cooking_time']
+    ordering_fields = ['name', 'cooking_time', 'popularity']
+
+    def get_queryset(self):
+        selection = FieldSelection(self.request.query_params)
+        queryset = Recipe.objects.all()
+        if selection.is_expanded('author'):
+            queryset = queryset.select_related('author')
+        if selection.includes('tags'):
+            queryset = queryset.prefetch_related('tags')
+        if selection.is_expanded('ingredients'):
+            queryset = queryset.prefetch_related(Prefetch(
+                'recipeingredient_set',
+                queryset=RecipeIngredient.objects.select_related(
+                    'ingredient'
+                ).order_by('id')
+            ))
+        elif selection.includes('ingredients'):
+            queryset = queryset.prefetch_related(Prefetch(
+                'recipeingredient_set',
+                queryset=RecipeIngredient.objects.order_by('id')
+            ))
+        if not selection.includes('text'):
+            queryset = queryset.defer('text')
+        user = self.request.user
+        lists = {
+            'annotated_favorites': ('is_favorited', FavoriteRecipe),
+            'annotated_shopping_cart': ('is_in_shopping_cart', ShoppingCart),
+        }
+        for annotation, (field, model) in lists.items():
+            if not selection.includes(field):
+                continue
+            queryset = queryset.annotate(**{
+                annotation: Exists(model.objects.filter(
+                    user=user, recipe=OuterRef('pk')
+                )) if user.is_authenticated else Value(False)
+            })
+        return queryset
 
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
             return RecipeSerializer
         return RecipeListSerializer
 
+    def _get_recipes_page(self, recipes):
+        page = self.paginate_queryset(RecipeValuesSerializer.get_values(
+            recipes, FieldSelection(self.request.query_params)
+        ))
+        serializer = RecipeValuesSerializer(
+            page, context=self.get_serializer_context()
+        )
+        return self.get_paginated_response(serializer.data)
+
+    def _get_id_list(self, param):
+        """Ids of ?param=1,2,3 (or repeated params) without duplicates.
+
+        Returns None when the parameter is missing or not a list of ids.
+        """
+        values = [
+            value.strip()
+            for values in self.request.query_params.getlist(param)
+            for value in values.split(',')
+        ]
+        if not values or not all(value.isdigit() for value in values):
+            return None
+        return list(dict.fromkeys(map(int, values)))
+
+    def _get_recipe_rows(self, recipe_ids, recipes=None):
+        """.values() rows of the recipes with recipe_ids, in the order given.
+
+        Rows always carry the id, unlike the serialized recipes when
+        ?fields= leaves it out.
+        """
+        if recipes is None:
+            recipes = self.get_queryset()
+        rank = {recipe_id: place for place, recipe_id in enumerate(recipe_ids)}
+        return sorted(
+            RecipeValuesSerializer.get_values(
+                recipes.filter(id__in=recipe_ids),
+                FieldSelection(self.request.query_params)
+            ),
+            key=lambda row: rank[row['id']]
+        )
+
+    def _get_recipes_by_ids(self, recipe_ids, recipes=None):
+        """Serialize the recipes with recipe_ids, in the order given."""
+        return RecipeValuesSerializer(
+            self._get_recipe_rows(recipe_ids, recipes),
+            context=self.get_serializer_context()
+        ).data
+
+    def _list_by_ids(self, recipes):
+        recipe_ids = self._get_id_list('ids')
+        if not recipe_ids or len(recipe_ids) > MAX_RECIPE_IDS:
+            return Response(
+                {'detail': f'Pass 1 to {MAX_RECIPE_IDS} recipe ids as '
+                           f'?ids=1,2,3.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        data = self._get_recipes_by_ids(recipe_ids, recipes)
+        return Response({
+            'count': len(data),
+            'next': None,
+            'previous': None,
+            'results': data,
+        })
+
+    def _get_tag_facets(self, recipes):
+        """Number of recipes of every tag among the filtered recipes."""
+        key = filter_signature(self.request, 'recipe-tag-facets')
+        facets = cache.get(key)
+        record_cache('tag_facets', facets is not None)
+        if facets is None:
+            facets = list(Tag.objects.annotate(count=Count(
+                'tagrecipe',
+                filter=Q(tagrecipe__recipe__in=recipes.order_by().values(
+                    'id'
+                ))
+            )).order_by('name').values('id', 'name', 'slug', 'count'))
+            cache.set(key, facets, FACETS_CACHE_TTL)
+        return facets
+
+    def list(self, request, *args, **kwargs):
+        recipes = self.filter_queryset(self.get_queryset())
+        if 'ids' in request.query_params:
+            return self._list_by_ids(recipes)
+        response = self._get_recipes_page(recipes)
+        if 'tags' in request.query_params.get('facets', '').split(','):
+            response.data['tag_facets'] = self._get_tag_facets(recipes)
+        return response
+
     @action(
         detail=True, methods=['post', 'delete'],
         permission_classes=[permissions.IsAuthenticated]
@@ -222,6 +405,143 @@ class RecipeViewSet(
             }
         )
 
+    @action(detail=True, methods=['get'])
+    def similar(self, request, pk=None):
+        recipe_index.sync()
+        if not pk.isdigit() or int(pk) not in recipe_index:
+            raise Http404
+        limit = request.query_params.get('limit', '')
+        limit = min(
+            int(limit) if limit.isdigit() else SIMILAR_LIMIT,
+            MAX_SIMILAR_LIMIT
+        )
+        return Response(self._get_recipes_by_ids(
+            recipe_index.similar(int(pk), limit)
+        ))
+
+    @action(detail=False, methods=['get'])
+    def cookable(self, request):
+        ingredient_ids = self._get_id_list('ingredients')
+        if not ingredient_ids or len(ingredient_ids) > MAX_INGREDIENT_IDS:
+            return Response(
+                {'detail': f'Pass 1 to {MAX_INGREDIENT_IDS} ingredient ids '
+                           f'as ?ingredients=1,2,3.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        max_missing = request.query_params.get('max_missing', '')
+        max_missing = min(
+            int(max_missing) if max_missing.isdigit() else 1,
+            MAX_MISSING_INGREDIENTS
+        )
+        recipe_index.sync()
+        page = self.paginate_queryset(recipe_index.cookable(
+            ingredient_ids, max_missing
+        ))
+        missing = dict(page)
+        rows = self._get_recipe_rows(list(missing))
+        data = RecipeValuesSerializer(
+            rows, context=self.get_serializer_context()
+        ).data
+        for row, recipe in zip(rows, data):
+            recipe['missing_ingredients'] = missing[row['id']]
+        return self.get_paginated_response(data)
+
+    @staticmethod
+    def _requested_ingredient_ids(items):
+        return {
+            int(ingredient['id'])
+            for item in items if isinstance(item, dict)
+            for ingredient in item.get('ingredients') or ()
+            if isinstance(ingredient, dict)
+            and str(ingredient.get('id', '')).isdigit()
+        }
+
+    @action(
+        detail=False, methods=['post'],
+        permission_classes=[permissions.IsAuthenticated]
+    )
+    def bulk(self, request):
+        items = request.data
+        if not isinstance(items, list) or not (
+            0 < len(items) <= MAX_BULK_RECIPES
+        ):
+            return Response(
+                {'detail': f'Pass a list of 1 to {MAX_BULK_RECIPES} '
+                           f'recipes.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        context = self.get_serializer_context()
+        context['tags_by_id'] = {tag.id: tag for tag in Tag.objects.all()}
+        context['ingredient_ids'] = set(Ingredient.objects.filter(
+            id__in=self._requested_ingredient_ids(items)
+        ).values_list('id', flat=True))
+        results = []
+        valid_items = []
+        for index, item in enumerate(items):
+            serializer = RecipeSerializer(data=item, context=context)
+            if serializer.is_valid():
+                valid_items.append(serializer.validated_data)
+                results.append({'index': index, 'status': 201})
+            else:
+                results.append({
+                    'index': index, 'status': 400,
+                    'errors': serializer.errors
+                })
+        recipes = iter(RecipeSerializer.create_many(
+            valid_items, request.user
+        ) if valid_items else ())
+        for result in results:
+            if result['status'] == 201:
+                result['id'] = next(recipes).id
+        if not valid_items:
+            response_status = status.HTTP_400_BAD_REQUEST
+        elif len(valid_items) < len(items):
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_201_CREATED
+        return Response(results, status=response_status)
+
+    @action(
+        detail=False, methods=['get'],
+        permission_classes=[permissions.IsAdminUser]
+    )
+    def export(self, request):
+        since = {}
+        for param in ('since_id', 'since_change'):
+            value = request.query_params.get(param)
+            if value is None:
+                continue
+            if not value.isdigit():
+                return Response(
+                    {'detail': f'{param} must be a positive integer.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            since[param] = int(value)
+        if 'since_change' in since and changes_pruned(since['since_change']):
+            return Response(
+                {'detail': 'since_change is older than the change log, '
+                           'run a full export.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        stream = (
+            aiter_ndjson if isinstance(request._request, ASGIRequest)
+            else iter_ndjson
+        )
+        response = StreamingHttpResponse(
+            stream(iter_recipes(**since)),
+            content_type='application/x-ndjson'
+        )
+        response['X-Export-Change-Id'] = current_change_id()
+        return response
+
+    @action(detail=False, methods=['get'])
+    def trending(self, request):
+        return self._get_recipes_page(
+            self.filter_queryset(self.get_queryset()).order_by(
+                '-popularity', '-id'
+            )
+        )
+
     @action(
         detail=False, methods=['get'],
         permission_classes=[permissions.IsAuthenticated]
@@ -234,7 +554,7 @@ class RecipeViewSet(
         permission_classes=[permissions.IsAuthenticated]
     )
     def shopping_list(self, request):
-        return self._get_user_recipes(request, 'shopping_carts')
+        return self._get_user_recipes(request, 'in_shopping_cart')
 
     @action(
         detail=False,
@@ -286,3 +606,51 @@ class RecipeViewSet(
         return Response(
             {'short-link': short_url}, status=status.HTTP_200_OK
         )
+
+
+def get_stream_user(request):
+    """User of the Authorization header or, for EventSource, ?ticket=."""
+    header = request.headers.get('Authorization', '').split()
+    if len(header) == 2 and header[0] == 'Token':
+        try:
+            user, _ = CachedTokenAuthentication().authenticate_credentials(
+                header[1]
+            )
+        except AuthenticationFailed:
+            return None
+        return user
+    ticket = request.GET.get('ticket')
+    return stream_ticket_user(ticket) if ticket else None
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def notification_ticket(request):
+    """Short-lived ticket for EventSource, which cannot send headers."""
+    return Response({'ticket': make_stream_ticket(request.user)})
+
+
+async def notification_stream(request):
+    """Server-sent events about new recipes of the followed authors.
+
+    Only served over ASGI, where every open stream is an idle coroutine
+    with a small queue. A WSGI server would read the endless stream into
+    memory and block a worker for good.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {'detail': 'The event stream needs an ASGI server.'},
+            status=status.HTTP_501_NOT_IMPLEMENTED
+        )
+    user = await sync_to_async(get_stream_user)(request)
+    if user is None:
+        return JsonResponse(
+            {'detail': 'Authentication credentials were not provided.'},
+            status=status.HTTP_401_UNAUTHORIZED
+        )
+    response = StreamingHttpResponse(
+        event_stream(user.id), content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,16 @@
+import pytest
+
+from api.views import IngredientViewSet
+
+
+@pytest.mark.benchmark(group='ingredients')
+@pytest.mark.parametrize('prefix', ('а', 'капу'))
+def test_ingredient_prefix_search(benchmark, make_request, prefix):
+    view = IngredientViewSet.as_view({'get': 'list'})
+    request = make_request('/api/ingredients/', {'name': prefix})
+    response = benchmark(view, request)
+    assert response.status_code == 200
+    assert all(
+        ingredient['name'].startswith(prefix)
+        for ingredient in response.data
+    )
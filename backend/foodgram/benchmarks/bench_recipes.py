@@ -0,0 +1,75 @@
+import pytest
+
+from api.fast_serializers import RecipeValuesSerializer
+from api.mixins import FieldSelection
+from api.serializers import RecipeListSerializer, RecipeSerializer
+from api.views import RecipeViewSet
+from tests.conftest import png_data_uri
+
+PAGE_SIZE = 100
+
+
+@pytest.mark.benchmark(group='recipes')
+def test_recipe_list_serializer(benchmark, drf_request):
+    request = drf_request('/api/recipes/', {'limit': PAGE_SIZE})
+    queryset = RecipeViewSet(request=request, action='list').get_queryset()
+
+    def serialize():
+        return RecipeListSerializer(
+            queryset.all()[:PAGE_SIZE], many=True,
+            context={'request': request}
+        ).data
+
+    data = benchmark(serialize)
+    assert len(data) == PAGE_SIZE
+
+
+@pytest.mark.benchmark(group='recipes')
+def test_recipe_values_serializer(benchmark, drf_request):
+    request = drf_request('/api/recipes/', {'limit': PAGE_SIZE})
+    queryset = RecipeViewSet(request=request, action='list').get_queryset()
+    rows = RecipeValuesSerializer.get_values(
+        queryset, FieldSelection(request.query_params)
+    )
+
+    def serialize():
+        return RecipeValuesSerializer(
+            rows.all()[:PAGE_SIZE], context={'request': request}
+        ).data
+
+    data = benchmark(serialize)
+    assert len(data) == PAGE_SIZE
+
+
+@pytest.mark.benchmark(group='recipes')
+def test_download_shopping_list(benchmark, make_request):
+    view = RecipeViewSet.as_view({'get': 'download_shopping_list'})
+    request = make_request('/api/recipes/download_shopping_cart/')
+    response = benchmark(view, request)
+    assert response.status_code == 200
+
+
+@pytest.mark.benchmark(group='recipes')
+def test_recipe_serializer_create(benchmark, drf_request, dataset):
+    request = drf_request('/api/recipes/')
+    payload = {
+        'name': 'Новый рецепт',
+        'text': 'Описание нового рецепта.',
+        'cooking_time': 30,
+        'image': png_data_uri(),
+        'tags': [tag.id for tag in dataset['tags'][:2]],
+        'ingredients': [
+            {'id': ingredient.id, 'amount': 10}
+            for ingredient in dataset['ingredients'][:10]
+        ],
+    }
+
+    def create():
+        serializer = RecipeSerializer(
+            data=payload, context={'request': request}
+        )
+        serializer.is_valid(raise_exception=True)
+        return serializer.save()
+
+    recipe = benchmark(create)
+    assert recipe.recipeingredient_set.count() == 10
@@ -0,0 +1,20 @@
+import pytest
+from rest_framework.renderers import JSONRenderer
+
+from api.renderers import ORJSONRenderer
+from api.serializers import RecipeListSerializer
+from api.views import RecipeViewSet
+
+
+@pytest.mark.benchmark(group='renderers')
+@pytest.mark.parametrize('page_size', (6, 100))
+@pytest.mark.parametrize('renderer_class', (JSONRenderer, ORJSONRenderer))
+def test_render_recipe_list(benchmark, drf_request, renderer_class,
+                            page_size):
+    request = drf_request('/api/recipes/', {'limit': page_size})
+    queryset = RecipeViewSet(request=request, action='list').get_queryset()
+    data = RecipeListSerializer(
+        queryset[:page_size], many=True, context={'request': request}
+    ).data
+    content = benchmark(renderer_class().render, data)
+    assert content == JSONRenderer().render(data)
@@ -0,0 +1,103 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+# Runs in a fresh interpreter: the in-memory test database only lives as
+# long as the process, so it is migrated without system checks, which
+# would load the URL configuration before the first request.
+STARTUP_SCRIPT = '''
+import asyncio
+import json
+import sys
+import time
+
+started = time.perf_counter()
+from foodgram.asgi import application
+imported = time.perf_counter()
+
+from asgiref.sync import async_to_sync
+from django.core.management import call_command
+
+
+async def receive():
+    if receive.sent:
+        await asyncio.Event().wait()
+    receive.sent = True
+    return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+
+async def send(message):
+    messages.append(message)
+
+
+receive.sent = False
+messages = []
+
+call_command('migrate', verbosity=0, skip_checks=True)
+warm_up = 0
+if sys.argv[1] == 'warm':
+    from api.warmup import warm_up
+    warm_up = warm_up()
+scope = {
+    'type': 'http', 'method': 'GET', 'path': '/api/recipes/',
+    'query_string': b'', 'headers': [(b'host', b'testserver')],
+}
+before_request = time.perf_counter()
+# Under async_to_sync the synchronous views run in this thread, which
+# holds the migrated in-memory database.
+async_to_sync(application)(scope, receive, send)
+print(json.dumps({
+    'status': messages[0]['status'],
+    'import_ms': round((imported - started) * 1000, 1),
+    'warm_up_ms': round(warm_up * 1000, 1),
+    'first_request_ms': round(
+        (time.perf_counter() - before_request) * 1000, 1
+    ),
+}))
+'''
+
+
+def start_worker(mode):
+    """Import foodgram.asgi in a new process and serve one request."""
+    env = {
+        **os.environ,
+        'DJANGO_SETTINGS_MODULE': 'foodgram.settings_test',
+        'ALLOWED_HOSTS': 'testserver',
+    }
+    result = subprocess.run(
+        [sys.executable, '-c', STARTUP_SCRIPT, mode],
+        cwd=PROJECT_DIR, env=env, capture_output=True, text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+@pytest.mark.benchmark(group='startup')
+def test_asgi_import(benchmark):
+    benchmark.pedantic(
+        subprocess.run,
+        args=([sys.executable, '-c', 'import foodgram.asgi'],),
+        kwargs={
+            'cwd': PROJECT_DIR,
+            'env': {
+                **os.environ,
+                'DJANGO_SETTINGS_MODULE': 'foodgram.settings_test',
+            },
+            'check': True,
+        },
+        rounds=5,
+    )
+
+
+@pytest.mark.benchmark(group='startup')
+@pytest.mark.parametrize('mode', ('cold', 'warm'))
+def test_first_request(benchmark, mode):
+    timings = benchmark.pedantic(start_worker, args=(mode,), rounds=3)
+    benchmark.extra_info.update(timings)
+    assert timings['status'] == 200
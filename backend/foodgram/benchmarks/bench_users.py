@@ -0,0 +1,45 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.views import CustomUserViewSet
+
+RECIPES_LIMIT = 3
+WRITES = ('INSERT', 'UPDATE', 'DELETE')
+
+
+@pytest.mark.benchmark(group='users')
+def test_subscriptions_with_recipes_limit(benchmark, make_request):
+    view = CustomUserViewSet.as_view({'get': 'subscriptions'})
+    request = make_request(
+        '/api/users/subscriptions/',
+        {'limit': 20, 'recipes_limit': RECIPES_LIMIT}
+    )
+    response = benchmark(view, request)
+    assert response.status_code == 200
+    assert all(
+        len(author['recipes']) <= RECIPES_LIMIT
+        for author in response.data['results']
+    )
+
+
+@pytest.mark.benchmark(group='users')
+def test_me(benchmark, bench_user):
+    client = APIClient()
+    token = Token.objects.create(user=bench_user)
+    client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+    client.get('/api/users/me/')
+
+    def me():
+        with CaptureQueriesContext(connection) as context:
+            response = client.get('/api/users/me/')
+        return response, context
+
+    response, context = benchmark(me)
+    assert response.status_code == 200
+    assert [
+        query for query in context.captured_queries
+        if query['sql'].lstrip().upper().startswith(WRITES)
+    ] == []
@@ -0,0 +1,155 @@
+import os
+import random
+
+import pytest
+from django.contrib.auth import get_user_model
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.models import (
+    FavoriteRecipe, Ingredient, Recipe, RecipeIngredient, ShoppingCart,
+    Subscription, Tag, TagRecipe
+)
+
+CustomUser = get_user_model()
+
+DATASET = {
+    'users': int(os.getenv('BENCH_USERS', 50)),
+    'recipes': int(os.getenv('BENCH_RECIPES', 300)),
+    'ingredients': int(os.getenv('BENCH_INGREDIENTS', 500)),
+    'tags': int(os.getenv('BENCH_TAGS', 5)),
+    'ingredients_per_recipe': int(
+        os.getenv('BENCH_INGREDIENTS_PER_RECIPE', 8)
+    ),
+    'favorites_per_user': int(os.getenv('BENCH_FAVORITES_PER_USER', 20)),
+    'cart_size': int(os.getenv('BENCH_CART_SIZE', 200)),
+    'subscriptions': int(os.getenv('BENCH_SUBSCRIPTIONS', 20)),
+    'seed': int(os.getenv('BENCH_SEED', 42)),
+}
+
+INGREDIENT_PREFIXES = (
+    'абрикос', 'баклажан', 'ваниль', 'горох', 'дыня',
+    'ежевика', 'желток', 'зелень', 'изюм', 'капуста',
+)
+
+
+def seed_dataset(config):
+    """Fill the database with a reproducible benchmark dataset."""
+    rnd = random.Random(config['seed'])
+    users = CustomUser.objects.bulk_create([
+        CustomUser(
+            username=f'bench_user_{i}',
+            email=f'bench_user_{i}@example.com',
+            first_name='Bench',
+            last_name=f'User {i}',
+        )
+        for i in range(config['users'])
+    ])
+    tags = Tag.objects.bulk_create([
+        Tag(name=f'Тег {i}', slug=f'tag_{i}', bit=i)
+        for i in range(config['tags'])
+    ])
+    ingredients = Ingredient.objects.bulk_create([
+        Ingredient(
+            name=f'{INGREDIENT_PREFIXES[i % len(INGREDIENT_PREFIXES)]} {i}',
+            measurement_unit=rnd.choice(('г', 'кг', 'мл', 'шт.')),
+        )
+        for i in range(config['ingredients'])
+    ])
+    recipe_tags = [
+        rnd.sample(tags, rnd.randint(1, len(tags)))
+        for _ in range(config['recipes'])
+    ]
+    recipes = Recipe.objects.bulk_create([
+        Recipe(
+            author=rnd.choice(users),
+            name=f'Рецепт {i}',
+            image='recipes/bench.png',
+            text='Описание рецепта. ' * 20,
+            cooking_time=rnd.randint(1, 180),
+            tags_mask=Tag.mask_for(recipe_tags[i]),
+        )
+        for i in range(config['recipes'])
+    ])
+    RecipeIngredient.objects.bulk_create([
+        RecipeIngredient(recipe=recipe, ingredient=ingredient,
+                         amount=rnd.randint(1, 500))
+        for recipe in recipes
+        for ingredient in rnd.sample(
+            ingredients, config['ingredients_per_recipe']
+        )
+    ])
+    TagRecipe.objects.bulk_create([
+        TagRecipe(recipe=recipe, tag=tag)
+        for recipe, tags_of_recipe in zip(recipes, recipe_tags)
+        for tag in tags_of_recipe
+    ])
+    FavoriteRecipe.objects.bulk_create([
+        FavoriteRecipe(user=user, recipe=recipe)
+        for user in users
+        for recipe in rnd.sample(
+            recipes, min(config['favorites_per_user'], len(recipes))
+        )
+    ])
+    Subscription.objects.bulk_create([
+        Subscription(user=user, author=author)
+        for user in users
+        for author in rnd.sample(
+            users, min(config['subscriptions'], len(users))
+        )
+        if author != user
+    ])
+    heavy_user = users[0]
+    ShoppingCart.objects.bulk_create([
+        ShoppingCart(user=heavy_user, recipe=recipe)
+        for recipe in rnd.sample(
+            recipes, min(config['cart_size'], len(recipes))
+        )
+    ])
+    return {
+        'user': heavy_user,
+        'tags': tags,
+        'ingredients': ingredients,
+    }
+
+
+@pytest.fixture(scope='package')
+def dataset(django_db_setup, django_db_blocker):
+    with django_db_blocker.unblock():
+        data = seed_dataset(DATASET)
+    yield data
+    with django_db_blocker.unblock():
+        CustomUser.objects.filter(username__startswith='bench_').delete()
+        Tag.objects.filter(slug__startswith='tag_').delete()
+        Ingredient.objects.filter(
+            id__in=[ingredient.id for ingredient in data['ingredients']]
+        ).delete()
+
+
+@pytest.fixture
+def bench_user(dataset, db):
+    return dataset['user']
+
+
+@pytest.fixture
+def api_factory():
+    return APIRequestFactory()
+
+
+@pytest.fixture
+def make_request(api_factory, bench_user):
+    """Build an authenticated GET request for views and serializers."""
+    def _make_request(path, data=None, user=bench_user):
+        request = api_factory.get(path, data)
+        force_authenticate(request, user=user)
+        return request
+    return _make_request
+
+
+@pytest.fixture
+def drf_request(make_request, bench_user):
+    def _drf_request(path, data=None):
+        request = Request(make_request(path, data))
+        request.user = bench_user
+        return request
+    return _drf_request
@@ -33,6 +33,8 @@ INSTALLED_APPS = [
 AUTH_USER_MODEL = 'api.CustomUser'
 
 MIDDLEWARE = [
+    'api.metrics.MetricsMiddleware',
+    'api.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -93,14 +95,45 @@ AUTH_PASSWORD_VALIDATORS = [
 
 
 REST_FRAMEWORK = {
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
+    'DEFAULT_PAGINATION_CLASS': (
+        'api.paginators.CountedLimitOffsetPagination'
+    ),
     'PAGE_SIZE': 6,
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+
+TOKEN_AUTH_CACHE = {
+    'MAX_SIZE': int(os.getenv('TOKEN_AUTH_CACHE_SIZE', 10000)),
+    'TTL': int(os.getenv('TOKEN_AUTH_CACHE_TTL', 30)),
+    'SHARED_CACHE': os.getenv('TOKEN_AUTH_SHARED_CACHE'),
+    'SHARED_TTL': int(os.getenv('TOKEN_AUTH_SHARED_CACHE_TTL', 300)),
+}
+
+# Page counts, tag facets and the tag and ingredient lists are cached
+# under versions bumped on writes. With several workers the cache has to
+# be shared, e.g. CACHE_BACKEND=django.core.cache.backends.db.DatabaseCache
+# with CACHE_LOCATION=foodgram_cache and manage.py createcachetable.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
 }
 
 
@@ -121,6 +154,20 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+MEDIA_CLEANUP_ASYNC = os.getenv('MEDIA_CLEANUP_ASYNC', 'True') == 'True'
+MEDIA_CLEANUP_GRACE = int(os.getenv('MEDIA_CLEANUP_GRACE', 60))
+
+PROFILING = {
+    'DIRECTORY': os.getenv('PROFILING_DIR', BASE_DIR / 'profiles'),
+    'TOKEN_MAX_AGE': int(os.getenv('PROFILING_TOKEN_MAX_AGE', 3600)),
+}
+
+WARM_UP = os.getenv('WARM_UP', 'True') == 'True'
+
+NOTIFICATIONS_BROKER = os.getenv(
+    'NOTIFICATIONS_BROKER', 'api.notifications.LocalBroker'
+)
+
 EMAIL_FILE_PATH = BASE_DIR / 'email'
 
 DJOSER = {
@@ -0,0 +1,33 @@
+import os
+import tempfile
+
+from .settings import *  # noqa: F401,F403
+
+SECRET_KEY = os.getenv('SECRET_KEY', 'foodgram-test-secret-key')
+
+if os.getenv('TEST_DB', 'sqlite') == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': ':memory:',
+        }
+    }
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.MD5PasswordHasher',
+]
+
+MEDIA_ROOT = tempfile.mkdtemp(prefix='foodgram-media-')
+# The cleaner checks references before deleting, a thread of its own
+# would query through a connection that does not see test transactions.
+MEDIA_CLEANUP_ASYNC = False
+
+PROFILING = {**PROFILING, 'DIRECTORY': tempfile.mkdtemp(  # noqa: F405
+    prefix='foodgram-profiles-'
+)}
@@ -3,6 +3,8 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
+from api.metrics import metrics_view
+
 
 urlpatterns = [
     path(
@@ -13,6 +15,10 @@ urlpatterns = [
         'api/',
         include('api.urls'),
     ),
+    path(
+        'metrics',
+        metrics_view
+    ),
 ]
 
 if settings.DEBUG:
@@ -0,0 +1,50 @@
+import os
+
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True') == 'True'
+
+
+def run_warm_up(log):
+    from django.conf import settings
+    from django.db import connections
+
+    if not settings.WARM_UP:
+        return
+    from api.warmup import warm_up
+    log.info('Warmed up in %.3fs', warm_up())
+    connections.close_all()
+
+
+def warn_local_cache(server):
+    """Cached versions of a per-process cache only follow local writes."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+    from django.conf import settings
+
+    backend = settings.CACHES['default']['BACKEND']
+    if server.cfg.workers > 1 and backend.endswith('.LocMemCache'):
+        server.log.warning(
+            '%d workers use a per-process cache, cached counts and '
+            'reference lists lag behind writes of other workers; set '
+            'CACHE_BACKEND to a shared cache.', server.cfg.workers
+        )
+
+
+def when_ready(server):
+    warn_local_cache(server)
+    if server.cfg.preload_app:
+        run_warm_up(server.log)
+
+
+def post_fork(server, worker):
+    from api.metrics import WORKERS
+    WORKERS.set(1)
+
+
+def post_worker_init(worker):
+    if not worker.cfg.preload_app:
+        run_warm_up(worker.log)
+
+
+def child_exit(server, worker):
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,96 @@
+import base64
+import io
+
+import pytest
+from PIL import Image
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+from api.models import (
+    FavoriteRecipe, Ingredient, Recipe, RecipeIngredient, ShoppingCart,
+    Subscription, Tag, TagRecipe
+)
+
+CustomUser = get_user_model()
+
+# Row counts of the populate fixture for checks that the number of
+# queries does not grow with the number of rows.
+SMALL, LARGE = 2, 8
+
+
+def png_data_uri():
+    """A 1x1 PNG as the base64 data URI the image fields accept."""
+    buffer = io.BytesIO()
+    Image.new('RGB', (1, 1)).save(buffer, format='PNG')
+    encoded = base64.b64encode(buffer.getvalue()).decode()
+    return f'data:image/png;base64,{encoded}'
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+@pytest.fixture
+def user(db):
+    return CustomUser.objects.create_user(
+        username='reader', email='reader@example.com', password='password'
+    )
+
+
+@pytest.fixture
+def user_client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.fixture
+def populate(user):
+    """Create size authors with one recipe each, all linked to user.
+
+    The recipes are favorited, put into the shopping cart and their
+    authors are followed, so every per-row relation is non-empty.
+    """
+    def _populate(size):
+        tags = Tag.objects.bulk_create([
+            Tag(name=f'Тег {i}', slug=f'tag_{i}', bit=i) for i in range(2)
+        ])
+        ingredients = Ingredient.objects.bulk_create([
+            Ingredient(name=f'Ингредиент {i}', measurement_unit='г')
+            for i in range(size * 2)
+        ])
+        authors = CustomUser.objects.bulk_create([
+            CustomUser(username=f'author_{i}', email=f'author_{i}@ex.com')
+            for i in range(size)
+        ])
+        recipes = Recipe.objects.bulk_create([
+            Recipe(
+                author=author, name=f'Рецепт {i}', image='recipes/r.png',
+                text='Описание', cooking_time=10 + i,
+                tags_mask=Tag.mask_for(tags)
+            )
+            for i, author in enumerate(authors)
+            for _ in range(2)
+        ])
+        RecipeIngredient.objects.bulk_create([
+            RecipeIngredient(recipe=recipe, ingredient=ingredient, amount=5)
+            for i, recipe in enumerate(recipes)
+            for ingredient in ingredients[i % size * 2:i % size * 2 + 2]
+        ])
+        TagRecipe.objects.bulk_create([
+            TagRecipe(recipe=recipe, tag=tag)
+            for recipe in recipes for tag in tags
+        ])
+        FavoriteRecipe.objects.bulk_create([
+            FavoriteRecipe(user=user, recipe=recipe) for recipe in recipes
+        ])
+        ShoppingCart.objects.bulk_create([
+            ShoppingCart(user=user, recipe=recipe) for recipe in recipes
+        ])
+        Subscription.objects.bulk_create([
+            Subscription(user=user, author=author) for author in authors
+        ])
+        return recipes
+    return _populate
@@ -0,0 +1,70 @@
+import pytest
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from api.models import CustomUser, Ingredient, Recipe, Tag
+from tests.conftest import LARGE, SMALL
+
+
+@pytest.fixture
+def admin_client(user):
+    user.is_staff = True
+    user.is_superuser = True
+    user.save()
+    client = Client()
+    client.force_login(user)
+    return client
+
+
+@pytest.mark.parametrize('model', [Recipe, CustomUser, Ingredient])
+def test_changelist_queries_do_not_grow(admin_client, user, populate, model):
+    populate(LARGE)
+    url = f'/admin/api/{model._meta.model_name}/'
+    counts = []
+    for size in (LARGE, SMALL):
+        keep = list(model.objects.exclude(pk=user.pk).values_list(
+            'pk', flat=True
+        )[:size])
+        model.objects.exclude(pk__in=keep + [user.pk]).delete()
+        with CaptureQueriesContext(connection) as queries:
+            assert admin_client.get(url).status_code == 200
+        counts.append(len(queries))
+    assert counts[0] == counts[1]
+
+
+def test_recipe_changelist_counts_favorites(admin_client, populate):
+    populate(SMALL)
+    response = admin_client.get('/admin/api/recipe/')
+    assert response.context['cl'].result_list[0].favorites_count == 1
+
+
+def test_change_form_uses_autocomplete(admin_client, populate):
+    recipe = populate(LARGE)[0]
+    response = admin_client.get(f'/admin/api/recipe/{recipe.id}/change/')
+    assert response.status_code == 200
+    content = response.content.decode()
+    assert 'admin-autocomplete' in content
+    assert 'Ингредиент 9</option>' not in content
+
+
+def test_saving_tags_updates_mask(admin_client, populate):
+    recipe = populate(SMALL)[0]
+    tag = Tag.objects.order_by('bit').first()
+    recipe.tags.clear()
+    recipe.tags.add(tag)
+    assert recipe.tags_mask != tag.mask
+    data = {
+        'author': recipe.author_id, 'name': recipe.name,
+        'text': recipe.text, 'cooking_time': recipe.cooking_time,
+        'recipeingredient_set-TOTAL_FORMS': 0,
+        'recipeingredient_set-INITIAL_FORMS': 0,
+        'tagrecipe_set-TOTAL_FORMS': 0,
+        'tagrecipe_set-INITIAL_FORMS': 0,
+    }
+    response = admin_client.post(
+        f'/admin/api/recipe/{recipe.id}/change/', data
+    )
+    assert response.status_code == 302, response.context['errors']
+    recipe.refresh_from_db()
+    assert recipe.tags_mask == tag.mask
@@ -0,0 +1,107 @@
+import pytest
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.authentication import TokenCache, token_cache
+from api.models import CustomUser
+
+
+@pytest.fixture(autouse=True)
+def clear_token_cache():
+    token_cache.clear()
+    yield
+    token_cache.clear()
+
+
+@pytest.fixture
+def token_client(user):
+    token = Token.objects.create(user=user)
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+    return client
+
+
+def token_queries(client):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get('/api/recipes/favorites/')
+    assert response.status_code == 200
+    return [
+        query['sql'] for query in context.captured_queries
+        if 'authtoken_token' in query['sql']
+    ]
+
+
+def test_repeated_requests_skip_token_query(token_client):
+    assert len(token_queries(token_client)) == 1
+    assert token_queries(token_client) == []
+
+
+def test_logout_invalidates_token(token_client):
+    token_queries(token_client)
+    response = token_client.post('/api/auth/token/logout/')
+    assert response.status_code == 204
+    assert token_client.get('/api/recipes/favorites/').status_code == 401
+
+
+def test_deactivation_invalidates_token(token_client, user):
+    token_queries(token_client)
+    user.is_active = False
+    user.save()
+    assert token_client.get('/api/recipes/favorites/').status_code == 401
+
+
+def test_password_change_refreshes_snapshot(token_client, user):
+    token_queries(token_client)
+    response = token_client.post('/api/users/set_password/', {
+        'current_password': 'password',
+        'new_password': 'N3w-passw0rd-value',
+    })
+    assert response.status_code == 204, response.content
+    assert len(token_queries(token_client)) == 1
+
+
+def test_shared_cache_is_used_by_other_processes(user):
+    token = Token.objects.create(user=user)
+    shared = caches['default']
+    first = TokenCache(max_size=10, ttl=30, shared_cache=shared)
+    second = TokenCache(max_size=10, ttl=30, shared_cache=shared)
+    first.set(token.key, user)
+    assert second.get(token.key).username == user.username
+    first.invalidate_user(user.pk)
+    second.clear()
+    assert second.get(token.key) is None
+
+
+def test_snapshot_leaves_out_password(user):
+    token = Token.objects.create(user=user)
+    shared = caches['default']
+    TokenCache(max_size=10, ttl=30, shared_cache=shared).set(token.key, user)
+    snapshot = shared.get(TokenCache._shared_key(token.key))
+    assert user.password not in snapshot
+    cached = TokenCache(
+        max_size=10, ttl=30, shared_cache=shared
+    ).get(token.key)
+    assert cached.check_password('password')
+
+
+def test_snapshot_saves_do_not_revert_other_changes(user):
+    token = Token.objects.create(user=user)
+    cache = TokenCache(max_size=10, ttl=30)
+    cache.set(token.key, user)
+    # Another process deactivates the user while the snapshot is cached.
+    CustomUser.objects.filter(pk=user.pk).update(
+        is_active=False, email='new@example.com'
+    )
+    cached = cache.get(token.key)
+    cached.first_name = 'Иван'
+    cached.save()
+    cached.set_password('N3w-passw0rd-value')
+    cached.save()
+    user.refresh_from_db()
+    assert user.first_name == 'Иван'
+    assert not user.is_active
+    assert user.email == 'new@example.com'
+    assert user.check_password('N3w-passw0rd-value')
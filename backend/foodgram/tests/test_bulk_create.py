@@ -0,0 +1,75 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.models import Ingredient, Recipe, RecipeChange, Tag
+from tests.conftest import png_data_uri
+
+
+@pytest.fixture
+def payload(db):
+    tags = Tag.objects.bulk_create([
+        Tag(name=f'Тег {i}', slug=f'tag_{i}', bit=i) for i in range(2)
+    ])
+    ingredients = Ingredient.objects.bulk_create([
+        Ingredient(name=f'Ингредиент {i}', measurement_unit='г')
+        for i in range(3)
+    ])
+
+    def _payload(size):
+        return [
+            {
+                'name': f'Рецепт {i}',
+                'text': 'Описание',
+                'cooking_time': 5,
+                'image': png_data_uri(),
+                'tags': [tag.id for tag in tags],
+                'ingredients': [
+                    {'id': ingredient.id, 'amount': i + 1}
+                    for ingredient in ingredients
+                ],
+            }
+            for i in range(size)
+        ]
+    return _payload
+
+
+def test_valid_and_invalid_items(
+    user_client, payload, django_capture_on_commit_callbacks
+):
+    items = payload(3)
+    items[1]['ingredients'][0]['id'] = 10 ** 6
+    items[2]['tags'] = [10 ** 6]
+    with django_capture_on_commit_callbacks(execute=True):
+        response = user_client.post(
+            '/api/recipes/bulk/', items, format='json'
+        )
+    assert response.status_code == 207
+    created, missing_ingredient, missing_tag = response.data
+    assert created['status'] == 201
+    assert 'ingredients' in missing_ingredient['errors']
+    assert 'tags' in missing_tag['errors']
+    recipe = Recipe.objects.get(id=created['id'])
+    assert recipe.tags.count() == 2
+    assert recipe.tags_mask == 0b11
+    assert recipe.recipeingredient_set.count() == 3
+    assert RecipeChange.objects.filter(recipe_id=recipe.id).exists()
+
+
+def test_query_count_does_not_grow(user_client, payload):
+    counts = []
+    for size in (2, 6):
+        with CaptureQueriesContext(connection) as queries:
+            response = user_client.post(
+                '/api/recipes/bulk/', payload(size), format='json'
+            )
+        assert response.status_code == 201
+        counts.append(len(queries))
+    assert counts[0] == counts[1]
+
+
+def test_rejects_non_list(user_client, payload):
+    response = user_client.post(
+        '/api/recipes/bulk/', payload(1)[0], format='json'
+    )
+    assert response.status_code == 400
@@ -0,0 +1,76 @@
+import pytest
+
+from api.constants import MAX_INGREDIENT_IDS
+from api.models import Ingredient, RecipeIngredient
+from api.recipe_index import recipe_index
+
+
+@pytest.fixture(autouse=True)
+def fresh_index():
+    recipe_index.reset()
+    yield
+    recipe_index.reset()
+
+
+def cookable(client, ingredients, **params):
+    response = client.get('/api/recipes/cookable/', {
+        'ingredients': ','.join(str(item.id) for item in ingredients),
+        **params
+    })
+    assert response.status_code == 200, response.content
+    return [
+        (recipe['id'], recipe['missing_ingredients'])
+        for recipe in response.data['results']
+    ]
+
+
+def test_ranked_by_coverage(client, populate):
+    recipes = populate(3)
+    ingredients = list(Ingredient.objects.order_by('id'))
+    assert cookable(client, ingredients[:3], max_missing=0) == [
+        (recipes[3].id, 0), (recipes[0].id, 0)
+    ]
+    assert cookable(client, ingredients[:3]) == [
+        (recipes[3].id, 0), (recipes[0].id, 0),
+        (recipes[4].id, 1), (recipes[1].id, 1),
+    ]
+
+
+def test_ingredients_are_required(client, db):
+    for params in ({}, {'ingredients': 'salt'}):
+        response = client.get('/api/recipes/cookable/', params)
+        assert response.status_code == 400
+
+
+def test_fields_without_id(client, populate):
+    populate(3)
+    ingredients = list(Ingredient.objects.order_by('id'))
+    response = client.get('/api/recipes/cookable/', {
+        'ingredients': ingredients[0].id, 'fields': 'name'
+    })
+    assert response.status_code == 200
+    assert response.data['results']
+    assert all(
+        set(recipe) == {'name', 'missing_ingredients'}
+        for recipe in response.data['results']
+    )
+
+
+def test_ingredient_list_is_capped(client, db):
+    response = client.get('/api/recipes/cookable/', {
+        'ingredients': ','.join(map(str, range(1, MAX_INGREDIENT_IDS + 2)))
+    })
+    assert response.status_code == 400
+
+
+def test_common_ingredients_are_not_walked(client, populate, monkeypatch):
+    recipes = populate(3)
+    ingredients = list(Ingredient.objects.order_by('id'))[:4]
+    RecipeIngredient.objects.create(
+        recipe=recipes[1], ingredient=ingredients[0], amount=1
+    )
+    expected = cookable(client, ingredients)
+    recipe_index.reset()
+    # Only the first ingredient is in more than two recipes.
+    monkeypatch.setattr('api.recipe_index.SIMILAR_MAX_POSTING', 2)
+    assert cookable(client, ingredients) == expected
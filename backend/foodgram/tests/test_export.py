@@ -0,0 +1,142 @@
+import datetime
+from functools import partial
+
+import orjson
+from asgiref.sync import async_to_sync
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from api.constants import RECIPE_CHANGE_OVERLAP
+from api.export import aiter_ndjson, current_change_id, iter_recipes
+from api.models import RecipeChange
+
+
+def export(client, **params):
+    response = client.get('/api/recipes/export/', params)
+    assert response.status_code == 200
+    assert response['Content-Type'] == 'application/x-ndjson'
+    return [
+        orjson.loads(line)
+        for line in b''.join(response.streaming_content).splitlines()
+    ]
+
+
+def test_export_is_staff_only(user_client):
+    assert user_client.get('/api/recipes/export/').status_code == 403
+
+
+def test_export_records(user, user_client, populate):
+    user.is_staff = True
+    user.save()
+    recipes = populate(2)
+    records = export(user_client)
+    assert [record['id'] for record in records] == [
+        recipe.id for recipe in sorted(recipes, key=lambda item: item.id)
+    ]
+    assert records[0]['author']['username'].startswith('author_')
+    assert len(records[0]['tags']) == 2
+    assert len(records[0]['ingredients']) == 2
+    assert export(user_client, since_id=recipes[1].id)[0]['id'] == (
+        recipes[1].id + 1
+    )
+    assert user_client.get(
+        '/api/recipes/export/', {'since_id': 'x'}
+    ).status_code == 400
+
+
+def test_export_since_change(populate):
+    recipes = populate(2)
+    RecipeChange.objects.bulk_create([
+        RecipeChange(recipe_id=recipes[0].id),
+        RecipeChange(recipe_id=recipes[2].id),
+        RecipeChange(recipe_id=recipes[0].id),
+    ])
+    deleted = recipes[2].id
+    recipes[2].delete()
+    records = list(iter_recipes(since_change=0))
+    assert records[0]['id'] == recipes[0].id
+    assert records[1] == {'id': deleted, 'deleted': True}
+
+
+def test_queries_per_chunk(populate):
+    populate(4)
+    with CaptureQueriesContext(connection) as queries:
+        assert len(list(iter_recipes(chunk_size=4))) == 8
+    assert len(queries) <= 2 * 3 + 1
+
+
+def test_export_command(populate, tmp_path):
+    populate(2)
+    output = tmp_path / 'recipes.ndjson'
+    call_command('export_recipes', '--output', str(output))
+    assert len(output.read_bytes().splitlines()) == 4
+
+
+def test_export_after_pruned_changes(user, user_client, populate):
+    user.is_staff = True
+    user.save()
+    recipes = populate(2)
+    changes = RecipeChange.objects.bulk_create(
+        RecipeChange(recipe_id=recipe.id) for recipe in recipes
+    )
+    RecipeChange.objects.filter(id__lt=changes[-1].id).delete()
+    response = user_client.get(
+        '/api/recipes/export/', {'since_change': changes[0].id - 1}
+    )
+    assert response.status_code == 400
+    records = export(user_client, since_change=changes[-1].id - 1)
+    assert [record['id'] for record in records] == [recipes[-1].id]
+
+
+def test_export_streams_under_asgi(user, async_client, populate,
+                                   monkeypatch):
+    user.is_staff = True
+    user.save()
+    populate(2)
+    read = []
+
+    def counted_recipes(**since):
+        for record in iter_recipes(**since):
+            read.append(record['id'])
+            yield record
+
+    monkeypatch.setattr('api.views.iter_recipes', counted_recipes)
+    monkeypatch.setattr(
+        'api.views.aiter_ndjson', partial(aiter_ndjson, chunk_size=1)
+    )
+    token = Token.objects.create(user=user)
+
+    async def first_line():
+        response = await async_client.get(
+            '/api/recipes/export/',
+            headers={'Authorization': f'Token {token.key}'}
+        )
+        content = response.streaming_content
+        line = await content.__anext__()
+        progress = len(read)
+        rest = [chunk async for chunk in content]
+        return response, line, progress, rest
+
+    response, line, progress, rest = async_to_sync(first_line)()
+    assert response.status_code == 200
+    assert orjson.loads(line)['id'] == read[0]
+    assert progress < len(read) == 1 + len(rest) == 4
+
+
+def test_change_id_leaves_out_recent_changes(populate):
+    recipes = populate(1)
+    old, recent = RecipeChange.objects.bulk_create(
+        RecipeChange(recipe_id=recipe.id) for recipe in recipes
+    )
+    assert current_change_id() == 0
+    RecipeChange.objects.filter(id=old.id).update(
+        created_at=timezone.now() - datetime.timedelta(
+            seconds=RECIPE_CHANGE_OVERLAP + 1
+        )
+    )
+    assert current_change_id() == old.id
+    records = list(iter_recipes(since_change=current_change_id()))
+    assert [record['id'] for record in records] == [recipes[1].id]
@@ -0,0 +1,62 @@
+import pytest
+from django.core.files.base import ContentFile
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.fast_serializers import RecipeValuesSerializer
+from api.mixins import FieldSelection
+from api.models import Ingredient
+from api.serializers import IngredientSerializer, RecipeListSerializer
+from api.views import RecipeViewSet
+
+SELECTIONS = (
+    {},
+    {'omit': 'text,author'},
+    {'fields': 'id,name,author,ingredients,tags'},
+    {'fields': 'id,is_favorited', 'expand': 'author,tags'},
+)
+
+
+@pytest.fixture
+def recipes(populate):
+    recipes = populate(3)
+    author = recipes[0].author
+    author.avatar.save('avatar.png', ContentFile(b'avatar'))
+    return recipes
+
+
+def make_view(user, params):
+    request = APIRequestFactory().get('/api/recipes/', params)
+    if user is not None:
+        force_authenticate(request, user)
+    return RecipeViewSet(request=Request(request), action='list')
+
+
+@pytest.mark.parametrize('params', SELECTIONS)
+@pytest.mark.parametrize('authenticated', (True, False))
+def test_recipe_values_serializer_parity(user, recipes, params,
+                                         authenticated):
+    view = make_view(user if authenticated else None, params)
+    request = view.request
+    queryset = view.get_queryset()
+    expected = RecipeListSerializer(
+        queryset, many=True, context={'request': request}
+    ).data
+    actual = RecipeValuesSerializer(
+        RecipeValuesSerializer.get_values(
+            queryset, FieldSelection(request.query_params)
+        ),
+        context={'request': request}
+    ).data
+    assert actual == expected
+
+
+def test_ingredient_list_parity(client, db):
+    Ingredient.objects.bulk_create([
+        Ingredient(name='соль', measurement_unit='г'),
+        Ingredient(name='сахар', measurement_unit='г'),
+    ])
+    response = client.get('/api/ingredients/', {'name': 'с'})
+    assert response.json() == IngredientSerializer(
+        Ingredient.objects.filter(name__startswith='с'), many=True
+    ).data
@@ -0,0 +1,108 @@
+import os
+import time
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.management import call_command
+
+from api.media import media_cleaner
+from api.storage import content_storage
+
+
+def age(name, seconds=3600):
+    """Move the modification time of a stored file into the past."""
+    past = time.time() - seconds
+    os.utime(default_storage.path(name), (past, past))
+
+
+def stored(name):
+    name = default_storage.save(name, ContentFile(b'image'))
+    age(name)
+    return name
+
+
+def test_avatar_delete_removes_file(
+    user, user_client, django_capture_on_commit_callbacks
+):
+    user.avatar = stored('avatars/reader.png')
+    user.save()
+    with django_capture_on_commit_callbacks(execute=True):
+        response = user_client.delete('/api/users/me/avatar/')
+    assert response.status_code == 204
+    media_cleaner.join()
+    assert not default_storage.exists('avatars/reader.png')
+
+
+def test_recipe_delete_removes_image(
+    populate, django_capture_on_commit_callbacks
+):
+    recipe = populate(1)[0]
+    recipe.image = stored('recipes/deleted.png')
+    recipe.save()
+    with django_capture_on_commit_callbacks(execute=True):
+        recipe.author.delete()
+    media_cleaner.join()
+    assert not default_storage.exists(recipe.image.name)
+
+
+def test_media_gc_deletes_orphans_only(populate):
+    recipe = populate(1)[0]
+    recipe.image = stored('recipes/kept.png')
+    recipe.save()
+    orphans = [stored('recipes/orphan.png'), stored('avatars/orphan.png')]
+    call_command('media_gc', '--dry-run', '--min-age=0')
+    assert all(default_storage.exists(name) for name in orphans)
+    call_command('media_gc', '--min-age=0', '--batch-size=1')
+    assert not any(default_storage.exists(name) for name in orphans)
+    assert default_storage.exists(recipe.image.name)
+
+
+def test_equal_uploads_share_one_file(
+    populate, django_capture_on_commit_callbacks
+):
+    recipes = populate(1)
+    names = []
+    for recipe in recipes:
+        recipe.image.save('photo.PNG', ContentFile(b'same image'))
+        names.append(recipe.image.name)
+    age(names[0])
+    assert names[0] == names[1]
+    assert names[0].startswith('recipes/')
+    assert names[0].endswith('.png')
+    with django_capture_on_commit_callbacks(execute=True):
+        recipes[0].delete()
+    media_cleaner.join()
+    assert default_storage.exists(names[0])
+    with django_capture_on_commit_callbacks(execute=True):
+        recipes[1].delete()
+    media_cleaner.join()
+    assert not default_storage.exists(names[0])
+
+
+def test_reused_file_survives_queued_delete(
+    populate, django_capture_on_commit_callbacks
+):
+    recipe, other = populate(1)
+    recipe.image.save('photo.png', ContentFile(b'shared image'))
+    age(recipe.image.name)
+    with django_capture_on_commit_callbacks(execute=True):
+        recipe.delete()
+        # The same content is uploaded again before the cleaner runs,
+        # the row using it is not committed yet.
+        name = default_storage.save(
+            'recipes/photo.png', ContentFile(b'shared image')
+        )
+    media_cleaner.join()
+    assert default_storage.exists(name)
+
+
+def test_concurrent_equal_uploads_share_one_file():
+    name = content_storage.save('recipes/race.png', ContentFile(b'race'))
+    # A second upload that checked for the file before it was stored.
+    second = FileSystemStorage.save(
+        content_storage, name, ContentFile(b'race')
+    )
+    assert second == name
+    assert os.listdir(os.path.dirname(content_storage.path(name))) == [
+        os.path.basename(name)
+    ]
@@ -0,0 +1,68 @@
+from asgiref.sync import async_to_sync
+from prometheus_client import REGISTRY
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_routes_are_labeled_by_action(user_client, populate):
+    recipe = populate(1)[0]
+    before = sample(
+        'foodgram_request_duration_seconds_count',
+        route='RecipeViewSet.favorite', method='DELETE', status='204'
+    )
+    queries = sample(
+        'foodgram_db_queries_count', route='RecipeViewSet.favorite'
+    )
+    response = user_client.delete(f'/api/recipes/{recipe.id}/favorite/')
+    assert response.status_code == 204
+    assert sample(
+        'foodgram_request_duration_seconds_count',
+        route='RecipeViewSet.favorite', method='DELETE', status='204'
+    ) == before + 1
+    assert sample(
+        'foodgram_db_queries_count', route='RecipeViewSet.favorite'
+    ) == queries + 1
+    assert sample('foodgram_active_requests') == 0
+
+
+def test_metrics_endpoint(client, db):
+    client.get('/api/tags/')
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    body = response.content.decode()
+    assert 'foodgram_request_duration_seconds_bucket' in body
+    assert 'route="TagViewSet.list"' in body
+
+
+def test_async_requests_count_queries(async_client, user, populate):
+    recipe = populate(1)[0]
+    queries = sample(
+        'foodgram_db_queries_count', route='RecipeViewSet.retrieve'
+    )
+    response = async_to_sync(async_client.get)(f'/api/recipes/{recipe.id}/')
+    assert response.status_code == 200
+    assert sample(
+        'foodgram_db_queries_count', route='RecipeViewSet.retrieve'
+    ) == queries + 1
+    assert sample(
+        'foodgram_db_queries_sum', route='RecipeViewSet.retrieve'
+    ) > 0
+
+
+def test_open_streams_are_active(user_client, async_client):
+    ticket = user_client.post('/api/notifications/ticket/').data['ticket']
+
+    async def open_stream():
+        response = await async_client.get(
+            '/api/notifications/stream/', {'ticket': ticket}
+        )
+        await response.streaming_content.__anext__()
+        active = sample('foodgram_active_requests')
+        await response.streaming_content.aclose()
+        response.close()
+        return active
+
+    assert async_to_sync(open_stream)() == 1
+    assert sample('foodgram_active_requests') == 0
@@ -0,0 +1,102 @@
+import asyncio
+
+import orjson
+import pytest
+from asgiref.sync import async_to_sync
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.models import Recipe, Subscription
+from api.notifications import broker, event_stream, notify_followers
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+async def next_event(stream):
+    return await asyncio.wait_for(stream.__anext__(), 1)
+
+
+def test_followers_get_new_recipes(
+    loop, user, populate, django_capture_on_commit_callbacks
+):
+    author = populate(1)[0].author
+    stream = event_stream(user.id)
+    stranger = event_stream(author.id)
+    retry = loop.run_until_complete(next_event(stream))
+    loop.run_until_complete(next_event(stranger))
+    assert retry.startswith(b'retry:')
+    with django_capture_on_commit_callbacks(execute=True):
+        recipe = Recipe.objects.create(
+            author=author, name='Новый', image='recipes/new.png',
+            text='Описание', cooking_time=5
+        )
+    event = loop.run_until_complete(next_event(stream))
+    name, data = event.strip().split(b'\n')
+    assert name == b'event: recipe'
+    assert orjson.loads(data.removeprefix(b'data: ')) == {
+        'id': recipe.id, 'name': 'Новый', 'author': author.id
+    }
+    assert all(
+        subscriber.queue.empty()
+        for subscriber in broker.subscribers[author.id]
+    )
+    loop.run_until_complete(stream.aclose())
+    loop.run_until_complete(stranger.aclose())
+    assert not broker.has_subscribers()
+
+
+def test_unread_stream_does_not_subscribe(user):
+    event_stream(user.id)
+    assert not broker.has_subscribers()
+
+
+def test_followers_are_read_in_one_query(loop, user, populate):
+    recipes = populate(3)
+    stream = event_stream(user.id)
+    loop.run_until_complete(next_event(stream))
+    assert Subscription.objects.filter(user=user).count() == 3
+    with CaptureQueriesContext(connection) as queries:
+        notify_followers(recipes)
+    assert len(queries) == 1
+    events = [
+        loop.run_until_complete(next_event(stream))
+        for _ in range(len(recipes))
+    ]
+    assert all(event.startswith(b'event: recipe') for event in events)
+    loop.run_until_complete(stream.aclose())
+
+
+def test_stream_needs_asgi(client, db):
+    response = client.get('/api/notifications/stream/')
+    assert response.status_code == 501
+
+
+def test_stream_requires_ticket(async_client, db):
+    response = async_to_sync(async_client.get)(
+        '/api/notifications/stream/', {'ticket': 'bad'}
+    )
+    assert response.status_code == 401
+
+
+def test_stream_with_ticket(user_client, async_client):
+    ticket = user_client.post('/api/notifications/ticket/').data['ticket']
+
+    async def open_stream():
+        response = await async_client.get(
+            '/api/notifications/stream/', {'ticket': ticket}
+        )
+        content = response.streaming_content
+        first = await next_event(content)
+        await content.aclose()
+        return response, first
+
+    response, first = async_to_sync(open_stream)()
+    assert response.status_code == 200
+    assert response['Content-Type'] == 'text/event-stream'
+    assert first.startswith(b'retry:')
+    assert not broker.has_subscribers()
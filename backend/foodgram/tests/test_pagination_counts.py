@@ -0,0 +1,42 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+
+def get_page(client, url, **params):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url, params)
+    assert response.status_code == 200
+    return response.data, len(queries)
+
+
+def test_count_is_cached_until_data_changes(
+    client, populate, django_capture_on_commit_callbacks
+):
+    recipes = populate(2)
+    first, cold = get_page(client, '/api/recipes/', limit=1)
+    second, warm = get_page(client, '/api/recipes/', limit=1, page=2)
+    assert first['count'] == second['count'] == len(recipes)
+    assert warm == cold - 1
+    with django_capture_on_commit_callbacks(execute=True):
+        recipes[0].delete()
+    data, _ = get_page(client, '/api/recipes/', limit=1)
+    assert data['count'] == len(recipes) - 1
+
+
+def test_user_lists_are_counted_per_user(user_client, populate):
+    recipes = populate(2)
+    data, _ = get_page(user_client, '/api/recipes/favorites/')
+    assert data['count'] == len(recipes)
+    other = APIClient()
+    other.force_authenticate(recipes[0].author)
+    data, _ = get_page(other, '/api/recipes/favorites/')
+    assert data['count'] == 0
+
+
+def test_response_shape_is_unchanged(client, populate):
+    populate(2)
+    for url in ('/api/recipes/', '/api/users/'):
+        data, _ = get_page(client, url, exact_count='false')
+        assert list(data) == ['count', 'next', 'previous', 'results']
+        assert data['count'] == len(data['results'])
@@ -0,0 +1,61 @@
+from pathlib import Path
+
+import orjson
+from asgiref.sync import async_to_sync
+from django.conf import settings
+
+from api.profiling import make_profiling_token
+
+
+def test_requests_without_token_are_not_profiled(client, db):
+    response = client.get('/api/tags/')
+    assert response.status_code == 200
+    assert 'X-Profile-Id' not in response
+
+
+def check_report(response):
+    assert response.status_code == 200
+    report = orjson.loads(response.content)
+    assert report['path'].startswith('/api/recipes/')
+    assert report['query_count'] == len(report['queries']) > 0
+    assert report['top_functions']
+    assert report['call_tree']['children']
+    directory = Path(settings.PROFILING['DIRECTORY'])
+    assert (directory / f'{response["X-Profile-Id"]}.prof').exists()
+
+
+def test_staff_token_returns_report(client, user, populate):
+    populate(2)
+    user.is_staff = True
+    user.save()
+    check_report(client.get(
+        '/api/recipes/', {'_profile_report': '1'},
+        HTTP_X_PROFILE=make_profiling_token(user)
+    ))
+
+
+def test_async_requests_are_profiled(async_client, user, populate):
+    populate(2)
+    user.is_staff = True
+    user.save()
+    check_report(async_to_sync(async_client.get)(
+        '/api/recipes/', {'_profile_report': '1'},
+        headers={'X-Profile': make_profiling_token(user)}
+    ))
+
+
+def test_other_tokens_are_ignored(client, user):
+    for token in (make_profiling_token(user), 'forged'):
+        response = client.get('/api/tags/', HTTP_X_PROFILE=token)
+        assert response.status_code == 200
+        assert 'X-Profile-Id' not in response
+
+
+def test_token_in_query_string_is_ignored(client, user):
+    user.is_staff = True
+    user.save()
+    response = client.get(
+        '/api/tags/', {'_profile': make_profiling_token(user)}
+    )
+    assert response.status_code == 200
+    assert 'X-Profile-Id' not in response
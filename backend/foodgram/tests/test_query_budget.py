@@ -0,0 +1,65 @@
+"""SQL query budgets for the API routes.
+
+Every route is requested at two page sizes. The number of queries must
+fit into the budget and must not grow with the number of rows.
+"""
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.conftest import LARGE, SMALL
+
+ROUTES = (
+    ('recipes-list', lambda r: '/api/recipes/', 5),
+    ('recipes-detail', lambda r: f'/api/recipes/{r[0].id}/', 4),
+    ('recipes-favorites', lambda r: '/api/recipes/favorites/', 5),
+    ('recipes-shopping-list', lambda r: '/api/recipes/shopping_list/', 5),
+    ('recipes-download',
+     lambda r: '/api/recipes/download_shopping_cart/', 1),
+    ('users-list', lambda r: '/api/users/', 3),
+    ('users-detail', lambda r: f'/api/users/{r[0].author_id}/', 2),
+    ('users-me', lambda r: '/api/users/me/', 1),
+    ('users-subscriptions', lambda r: '/api/users/subscriptions/', 4),
+    ('tags-list', lambda r: '/api/tags/', 1),
+    ('ingredients-list', lambda r: '/api/ingredients/', 1),
+)
+# Query parameters sent along with the page size.
+PARAMS = {
+    'users-subscriptions': {'recipes_limit': 1},
+}
+
+
+def count_queries(client, url, size, params):
+    cache.clear()
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url, {'limit': size, **params})
+    assert response.status_code == 200, response.content
+    return len(context.captured_queries)
+
+
+@pytest.mark.parametrize(
+    'get_url,budget,params',
+    [(*route[1:], PARAMS.get(route[0], {})) for route in ROUTES],
+    ids=[route[0] for route in ROUTES]
+)
+def test_query_budget(user_client, populate, get_url, budget, params):
+    recipes = populate(LARGE)
+    url = get_url(recipes)
+    small = count_queries(user_client, url, SMALL, params)
+    large = count_queries(user_client, url, LARGE, params)
+    assert small == large, (
+        f'{url}: {small} queries for {SMALL} rows, '
+        f'{large} queries for {LARGE} rows'
+    )
+    assert large <= budget, f'{url}: {large} queries, budget is {budget}'
+
+
+def test_subscriptions_recipes_limit(user_client, populate):
+    populate(SMALL)
+    response = user_client.get('/api/users/subscriptions/', {
+        'limit': SMALL, **PARAMS['users-subscriptions']
+    })
+    assert response.status_code == 200
+    authors = response.data['results']
+    assert [len(author['recipes']) for author in authors] == [1] * SMALL
@@ -0,0 +1,100 @@
+import datetime
+
+import pytest
+from django.utils import timezone
+
+from api.models import (
+    FavoriteRecipe, PopularityEpoch, PopularityEvent, Recipe, ShoppingCart
+)
+from api.ranking import REBASE_AFTER, rebuild_popularity, refresh_popularity
+
+
+def age(model, recipe, days):
+    model.objects.filter(recipe=recipe).update(
+        created_at=timezone.now() - datetime.timedelta(days=days)
+    )
+
+
+def trending_ids(client, **params):
+    response = client.get('/api/recipes/trending/', params)
+    assert response.status_code == 200
+    return [recipe['id'] for recipe in response.data['results']]
+
+
+@pytest.fixture
+def recipes(populate):
+    recipes = populate(2)
+    FavoriteRecipe.objects.all().delete()
+    ShoppingCart.objects.all().delete()
+    PopularityEvent.objects.all().delete()
+    return recipes
+
+
+def test_recent_events_outweigh_old_ones(client, user, recipes):
+    old, fresh = recipes[:2]
+    FavoriteRecipe.objects.create(user=user, recipe=old)
+    ShoppingCart.objects.create(user=user, recipe=old)
+    age(FavoriteRecipe, old, 60)
+    age(ShoppingCart, old, 60)
+    FavoriteRecipe.objects.create(user=user, recipe=fresh)
+    assert rebuild_popularity() == 2
+    assert trending_ids(client, limit=3) == [fresh.id, old.id, recipes[-1].id]
+
+
+def test_refresh_is_incremental(client, user, recipes):
+    first, second = recipes[:2]
+    FavoriteRecipe.objects.create(user=user, recipe=first)
+    assert refresh_popularity() == 1
+    assert refresh_popularity() == 0
+    FavoriteRecipe.objects.create(user=recipes[2].author, recipe=second)
+    ShoppingCart.objects.create(user=user, recipe=second)
+    assert refresh_popularity(batch_size=1) == 2
+    assert trending_ids(client, limit=2) == [second.id, first.id]
+
+
+def test_removals_are_subtracted(user, recipes):
+    recipe = recipes[0]
+    for _ in range(3):
+        FavoriteRecipe.objects.create(user=user, recipe=recipe)
+        refresh_popularity()
+        FavoriteRecipe.objects.filter(user=user, recipe=recipe).delete()
+        refresh_popularity()
+    recipe.refresh_from_db()
+    assert recipe.popularity == pytest.approx(0, abs=1e-6)
+
+
+def test_late_events_are_not_skipped(user, recipes):
+    FavoriteRecipe.objects.create(user=user, recipe=recipes[1])
+    refresh_popularity()
+    # An event with a lower id, committed after the refresh.
+    PopularityEvent.objects.create(
+        id=0, recipe_id=recipes[0].id, weight=1, created_at=timezone.now()
+    )
+    assert refresh_popularity() == 1
+    assert Recipe.objects.get(id=recipes[0].id).popularity > 0
+
+
+def test_epoch_is_rebased(user, recipes):
+    now = timezone.now()
+    PopularityEpoch.objects.create(
+        pk=1, started_at=now - REBASE_AFTER + datetime.timedelta(hours=1)
+    )
+    FavoriteRecipe.objects.create(user=user, recipe=recipes[0])
+    refresh_popularity()
+    before = Recipe.objects.get(id=recipes[0].id).popularity
+    later = now + datetime.timedelta(days=1)
+    ShoppingCart.objects.create(user=user, recipe=recipes[1])
+    refresh_popularity(now=later)
+    assert PopularityEpoch.objects.get().started_at == later
+    rebased = Recipe.objects.in_bulk([recipes[0].id, recipes[1].id])
+    assert rebased[recipes[0].id].popularity < before
+    assert rebased[recipes[0].id].popularity > rebased[
+        recipes[1].id
+    ].popularity
+
+
+def test_ordering_by_popularity(client, user, recipes):
+    FavoriteRecipe.objects.create(user=user, recipe=recipes[1])
+    refresh_popularity()
+    response = client.get('/api/recipes/', {'ordering': '-popularity'})
+    assert response.data['results'][0]['id'] == recipes[1].id
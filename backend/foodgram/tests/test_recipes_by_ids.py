@@ -0,0 +1,45 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.conftest import LARGE, SMALL
+
+
+def get_by_ids(client, recipe_ids, **params):
+    ids = ','.join(map(str, recipe_ids))
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get('/api/recipes/', {'ids': ids, **params})
+    return response, len(queries)
+
+
+def test_keeps_requested_order(user_client, populate):
+    recipes = populate(LARGE)
+    recipe_ids = [recipes[3].id, recipes[0].id, recipes[7].id]
+    response, _ = get_by_ids(user_client, recipe_ids + [recipes[3].id])
+    assert response.status_code == 200
+    assert response.data['count'] == 3
+    assert [item['id'] for item in response.data['results']] == recipe_ids
+    assert response.data['results'][0]['is_favorited'] is True
+
+
+def test_unknown_ids_and_filters_are_skipped(user_client, populate):
+    recipes = populate(SMALL)
+    author = recipes[0].author_id
+    response, _ = get_by_ids(
+        user_client, [10 ** 6, recipes[0].id, recipes[-1].id], author=author
+    )
+    assert [item['id'] for item in response.data['results']] == [
+        recipes[0].id
+    ]
+
+
+def test_queries_do_not_grow(user_client, populate):
+    recipes = populate(LARGE)
+    _, small = get_by_ids(user_client, [r.id for r in recipes[:SMALL]])
+    _, large = get_by_ids(user_client, [r.id for r in recipes])
+    assert small == large
+
+
+def test_invalid_ids(user_client, db):
+    for ids in ('', 'a,b', ','.join(map(str, range(1, 102)))):
+        response = user_client.get('/api/recipes/', {'ids': ids})
+        assert response.status_code == 400
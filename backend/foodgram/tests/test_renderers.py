@@ -0,0 +1,62 @@
+import datetime
+import decimal
+import io
+import uuid
+
+import pytest
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.utils.serializer_helpers import ReturnDict
+
+from api.parsers import ORJSONParser
+from api.renderers import ORJSONRenderer
+from api.serializers import RecipeListSerializer
+from api.views import RecipeViewSet
+
+PAYLOADS = (
+    {'name': 'Борщ', 'amount': 10, 'flag': True, 'empty': None},
+    [{'tags': []}, {'text': 'строка разрыв абзац'}],
+    {'price': decimal.Decimal('12.50'), 'ratio': 0.1},
+    {'created': datetime.datetime(
+        2025, 1, 2, 3, 4, 5, 678901, tzinfo=datetime.timezone.utc
+    )},
+    {'day': datetime.date(2025, 1, 2), 'id': uuid.UUID(int=1)},
+    {1: 'integer key', 'big': 2 ** 70},
+    ReturnDict({'nested': {'list': [1, 2, 3]}}, serializer=None),
+)
+
+
+@pytest.mark.parametrize('data', PAYLOADS)
+def test_renderer_is_byte_compatible(data):
+    assert ORJSONRenderer().render(data) == JSONRenderer().render(data)
+
+
+def test_renderer_keeps_indent_from_accept_header():
+    data = {'name': 'Борщ'}
+    media_type = 'application/json; indent=4'
+    assert ORJSONRenderer().render(data, media_type) == (
+        JSONRenderer().render(data, media_type)
+    )
+
+
+def test_recipe_list_is_byte_compatible(rf, user, populate):
+    populate(3)
+    request = Request(rf.get('/api/recipes/'))
+    request.user = user
+    queryset = RecipeViewSet(request=request, action='list').get_queryset()
+    data = RecipeListSerializer(
+        queryset, many=True, context={'request': request}
+    ).data
+    assert ORJSONRenderer().render(data) == JSONRenderer().render(data)
+
+
+@pytest.mark.parametrize('body', (
+    '{"name": "Борщ", "ingredients": [{"id": 1, "amount": 10}]}',
+    '[1, 2.5, null, true, "\\u2028"]',
+))
+def test_parser_matches_json_parser(body):
+    encoded = body.encode()
+    assert ORJSONParser().parse(io.BytesIO(encoded)) == (
+        JSONParser().parse(io.BytesIO(encoded))
+    )
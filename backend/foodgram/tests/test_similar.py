@@ -0,0 +1,96 @@
+import datetime
+
+import pytest
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.models import RecipeChange, RecipeIngredient
+from api.recipe_index import prune_recipe_changes, recipe_index
+
+
+@pytest.fixture(autouse=True)
+def fresh_index():
+    recipe_index.reset()
+    yield
+    recipe_index.reset()
+
+
+def similar_ids(client, recipe, **params):
+    response = client.get(f'/api/recipes/{recipe.id}/similar/', params)
+    assert response.status_code == 200
+    return [item['id'] for item in response.data]
+
+
+def test_shared_ingredients_rank_first(client, populate):
+    recipes = populate(3)
+    ids = similar_ids(client, recipes[0])
+    assert ids[0] == recipes[3].id
+    assert recipes[0].id not in ids
+    assert len(ids) == len(recipes) - 1
+    assert similar_ids(client, recipes[0], limit=1) == [recipes[3].id]
+
+
+def test_unknown_recipe(client, db):
+    assert client.get('/api/recipes/1/similar/').status_code == 404
+
+
+def test_index_follows_changes(
+    client, populate, django_capture_on_commit_callbacks
+):
+    recipes = populate(3)
+    similar_ids(client, recipes[0])
+    author_client = APIClient()
+    author_client.force_authenticate(recipes[1].author)
+    ingredients = list(RecipeIngredient.objects.filter(
+        recipe=recipes[0]
+    ).values('ingredient_id', 'amount'))
+    with django_capture_on_commit_callbacks(execute=True):
+        response = author_client.patch(
+            f'/api/recipes/{recipes[1].id}/',
+            {
+                'ingredients': [
+                    {'id': row['ingredient_id'], 'amount': row['amount']}
+                    for row in ingredients
+                ],
+                'tags': list(recipes[1].tags.values_list('id', flat=True)),
+            },
+            format='json'
+        )
+    assert response.status_code == 200, response.content
+    assert set(similar_ids(client, recipes[0], limit=2)) == {
+        recipes[1].id, recipes[3].id
+    }
+    with django_capture_on_commit_callbacks(execute=True):
+        recipes[3].delete()
+    assert recipes[3].id not in similar_ids(client, recipes[0])
+
+
+def test_late_changes_are_applied(client, populate):
+    recipes = populate(3)
+    RecipeChange.objects.create(recipe_id=recipes[0].id)
+    deleted_id = recipes[3].id
+    assert deleted_id in similar_ids(client, recipes[0])
+    recipes[3].delete()
+    # Logged with an id below the index version, as a change whose
+    # transaction committed after a later one.
+    RecipeChange.objects.create(id=0, recipe_id=deleted_id)
+    assert deleted_id not in similar_ids(client, recipes[0])
+
+
+def test_pruned_log_rebuilds_index(client, populate):
+    recipes = populate(3)
+    changes = RecipeChange.objects.bulk_create(
+        RecipeChange(recipe_id=recipe.id) for recipe in recipes
+    )
+    similar_ids(client, recipes[0])
+    recipe_index.version = changes[0].id
+    RecipeChange.objects.update(
+        created_at=timezone.now() - datetime.timedelta(days=30)
+    )
+    assert prune_recipe_changes(timezone.now()) == len(changes) - 1
+    assert list(RecipeChange.objects.values_list('id', flat=True)) == [
+        changes[-1].id
+    ]
+    deleted_id = recipes[3].id
+    recipes[3].delete()
+    assert deleted_id not in similar_ids(client, recipes[0])
@@ -0,0 +1,67 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def get_first(client, url, params):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url, params)
+    assert response.status_code == 200, response.content
+    return response.data['results'][0], len(context.captured_queries)
+
+
+@pytest.fixture
+def recipes(populate):
+    return populate(3)
+
+
+def test_full_payload_by_default(user_client, recipes):
+    recipe, _ = get_first(user_client, '/api/recipes/', {})
+    assert set(recipe) == {
+        'id', 'tags', 'author', 'ingredients', 'is_favorited',
+        'is_in_shopping_cart', 'name', 'image', 'text', 'cooking_time'
+    }
+    assert isinstance(recipe['author'], dict)
+
+
+def test_fields_prune_payload_and_queries(user_client, recipes):
+    recipe, queries = get_first(
+        user_client, '/api/recipes/', {'fields': 'id,name,cooking_time'}
+    )
+    assert set(recipe) == {'id', 'name', 'cooking_time'}
+    assert queries == 2
+
+
+def test_omit_removes_fields(user_client, recipes):
+    recipe, _ = get_first(
+        user_client, '/api/recipes/', {'omit': 'text,ingredients'}
+    )
+    assert 'text' not in recipe and 'ingredients' not in recipe
+    assert isinstance(recipe['author'], dict)
+
+
+def test_nested_relations_collapse_unless_expanded(user_client, recipes):
+    recipe, queries = get_first(
+        user_client, '/api/recipes/',
+        {'fields': 'id,author,ingredients,tags'}
+    )
+    assert recipe['author'] == recipes[-1].author_id
+    assert recipe['ingredients'] == [
+        item.ingredient_id
+        for item in recipes[-1].recipeingredient_set.all()
+    ]
+    assert recipe['tags'] == [tag.id for tag in recipes[-1].tags.all()]
+    assert queries == 4
+    recipe, _ = get_first(
+        user_client, '/api/recipes/', {'fields': 'id', 'expand': 'author'}
+    )
+    assert set(recipe) == {'id', 'author'}
+    assert recipe['author']['id'] == recipes[-1].author_id
+
+
+def test_user_fields(user_client, recipes):
+    user, queries = get_first(
+        user_client, '/api/users/', {'fields': 'id,username'}
+    )
+    assert set(user) == {'id', 'username'}
+    assert queries == 2
@@ -0,0 +1,49 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.models import FavoriteRecipe, Tag, TagRecipe
+
+
+def get_facets(client, **params):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get('/api/recipes/', {'facets': 'tags', **params})
+    assert response.status_code == 200
+    return {
+        facet['slug']: facet['count'] for facet in response.data['tag_facets']
+    }, len(queries)
+
+
+def test_facets_follow_filters(user_client, user, populate):
+    recipes = populate(2)
+    TagRecipe.objects.filter(recipe=recipes[0], tag__slug='tag_1').delete()
+    assert get_facets(user_client)[0] == {'tag_0': 4, 'tag_1': 3}
+    FavoriteRecipe.objects.filter(user=user).exclude(
+        recipe=recipes[0]
+    ).delete()
+    assert get_facets(user_client, is_favorited=1)[0] == {
+        'tag_0': 1, 'tag_1': 0
+    }
+    author = recipes[2].author_id
+    assert get_facets(user_client, author=author)[0] == {
+        'tag_0': 2, 'tag_1': 2
+    }
+
+
+def test_facets_are_cached_until_data_changes(
+    client, populate, django_capture_on_commit_callbacks
+):
+    populate(2)
+    facets, _ = get_facets(client)
+    with CaptureQueriesContext(connection) as plain:
+        client.get('/api/recipes/')
+    assert get_facets(client) == (facets, len(plain))
+    with django_capture_on_commit_callbacks(execute=True):
+        Tag.objects.create(name='Новый', slug='new')
+    facets, queries = get_facets(client)
+    assert facets['new'] == 0
+    assert queries > len(plain)
+
+
+def test_no_facets_by_default(client, populate):
+    populate(2)
+    assert 'tag_facets' not in client.get('/api/recipes/').data
@@ -0,0 +1,82 @@
+import pytest
+
+from api.models import Ingredient, Recipe, Tag
+from tests.conftest import png_data_uri
+
+
+@pytest.fixture
+def tags(db):
+    return [
+        Tag.objects.create(name=name, slug=slug)
+        for name, slug in (
+            ('Завтрак', 'breakfast'), ('Обед', 'lunch'), ('Ужин', 'dinner')
+        )
+    ]
+
+
+@pytest.fixture
+def create_recipe(user_client, tags):
+    ingredient = Ingredient.objects.create(name='Соль', measurement_unit='г')
+
+    def _create_recipe(name, recipe_tags):
+        response = user_client.post('/api/recipes/', {
+            'name': name,
+            'text': 'Описание',
+            'cooking_time': 5,
+            'image': png_data_uri(),
+            'tags': [tag.id for tag in recipe_tags],
+            'ingredients': [{'id': ingredient.id, 'amount': 1}],
+        }, format='json')
+        assert response.status_code == 201, response.content
+        return Recipe.objects.get(id=response.data['id'])
+    return _create_recipe
+
+
+def filtered_names(client, *slugs):
+    response = client.get('/api/recipes/', {'tags': slugs, 'limit': 100})
+    assert response.status_code == 200
+    return [recipe['name'] for recipe in response.data['results']]
+
+
+def test_tags_get_distinct_bits(tags):
+    assert len({tag.bit for tag in tags}) == len(tags)
+
+
+def test_filter_by_tags_without_duplicates(user_client, tags,
+                                           create_recipe):
+    breakfast, lunch, dinner = tags
+    create_recipe('Омлет', [breakfast, lunch])
+    create_recipe('Суп', [lunch])
+    create_recipe('Рагу', [dinner])
+    assert filtered_names(user_client, 'breakfast') == ['Омлет']
+    assert filtered_names(user_client, 'breakfast', 'lunch') == [
+        'Суп', 'Омлет'
+    ]
+    assert filtered_names(user_client) == ['Рагу', 'Суп', 'Омлет']
+
+
+def test_tags_mask_follows_recipe_update(user_client, tags, create_recipe):
+    breakfast, lunch, dinner = tags
+    recipe = create_recipe('Омлет', [breakfast])
+    response = user_client.patch(
+        f'/api/recipes/{recipe.id}/',
+        {
+            'tags': [dinner.id],
+            'ingredients': [
+                {'id': Ingredient.objects.get().id, 'amount': 2}
+            ],
+        },
+        format='json'
+    )
+    assert response.status_code == 200, response.content
+    assert filtered_names(user_client, 'breakfast') == []
+    assert filtered_names(user_client, 'dinner') == ['Омлет']
+
+
+def test_deleted_tag_bit_is_cleared(user_client, tags, create_recipe):
+    breakfast, lunch, dinner = tags
+    create_recipe('Омлет', [breakfast])
+    breakfast.delete()
+    brunch = Tag.objects.create(name='Бранч', slug='brunch')
+    assert brunch.bit == breakfast.bit
+    assert filtered_names(user_client, 'brunch') == []
@@ -0,0 +1,62 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import (
+    APIClient, APIRequestFactory, force_authenticate
+)
+
+from api.authentication import token_cache
+from api.views import CustomUserViewSet
+
+WRITES = ('INSERT', 'UPDATE', 'DELETE')
+
+
+def writes(context):
+    return [
+        query['sql'] for query in context.captured_queries
+        if query['sql'].lstrip().upper().startswith(WRITES)
+    ]
+
+
+@pytest.fixture
+def token_client(user):
+    token_cache.clear()
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}'
+    )
+    yield client
+    token_cache.clear()
+
+
+def test_me_endpoint_is_read_only_and_cached(token_client, user):
+    token_client.get('/api/users/me/')
+    with CaptureQueriesContext(connection) as context:
+        response = token_client.get('/api/users/me/')
+    assert response.status_code == 200
+    assert response.data['username'] == user.username
+    assert response.data['is_subscribed'] is False
+    assert context.captured_queries == []
+
+
+def test_me_action_get_does_not_write(user):
+    request = APIRequestFactory().get('/api/users/me/')
+    force_authenticate(request, user)
+    view = CustomUserViewSet.as_view({'get': 'me'})
+    with CaptureQueriesContext(connection) as context:
+        response = view(request)
+    assert response.status_code == 200
+    assert response.data['email'] == user.email
+    assert writes(context) == []
+
+
+def test_me_action_patch_updates_user(user):
+    request = APIRequestFactory().patch(
+        '/api/users/me/', {'first_name': 'Новое'}, format='json'
+    )
+    force_authenticate(request, user)
+    response = CustomUserViewSet.as_view({'patch': 'me'})(request)
+    assert response.status_code == 200
+    user.refresh_from_db()
+    assert user.first_name == 'Новое'
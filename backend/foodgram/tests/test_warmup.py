@@ -0,0 +1,76 @@
+import json
+
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.models import Ingredient, Tag
+from api.warmup import warm_up
+
+
+def test_warm_up_serves_reference_data_from_cache(user_client, populate):
+    populate(2)
+    warm_up()
+    with CaptureQueriesContext(connection) as queries:
+        tags = user_client.get('/api/tags/')
+        ingredients = user_client.get('/api/ingredients/')
+    assert [tag['slug'] for tag in tags.data] == ['tag_0', 'tag_1']
+    assert len(ingredients.data) == 4
+    assert not [
+        query for query in queries
+        if 'api_tag' in query['sql'] or 'api_ingredient' in query['sql']
+    ]
+
+
+def test_reference_data_follows_writes(
+    user_client, populate, django_capture_on_commit_callbacks
+):
+    populate(1)
+    warm_up()
+    with django_capture_on_commit_callbacks(execute=True):
+        Ingredient.objects.create(name='Соль', measurement_unit='г')
+        Tag.objects.filter(slug='tag_1').delete()
+    ingredients = user_client.get('/api/ingredients/').data
+    assert 'Соль' in [ingredient['name'] for ingredient in ingredients]
+    assert [tag['slug'] for tag in user_client.get('/api/tags/').data] == [
+        'tag_0'
+    ]
+    prefixed = user_client.get('/api/ingredients/', {'name': 'Со'}).data
+    assert [ingredient['name'] for ingredient in prefixed] == ['Соль']
+
+
+def test_loaded_ingredients_are_listed(
+    user_client, populate, tmp_path, django_capture_on_commit_callbacks
+):
+    populate(1)
+    warm_up()
+    path = tmp_path / 'ingredients.json'
+    path.write_text(json.dumps([
+        {'name': 'Соль', 'measurement_unit': 'г'},
+        {'name': 'Соль', 'measurement_unit': 'г'},
+    ]), encoding='utf-8')
+    with django_capture_on_commit_callbacks(execute=True):
+        call_command('load_ingredients', str(path))
+        call_command('load_ingredients', str(path))
+    names = [
+        ingredient['name']
+        for ingredient in user_client.get('/api/ingredients/').data
+    ]
+    assert names.count('Соль') == 1
+
+
+def test_favorites_keep_reference_data(
+    user, user_client, populate, django_capture_on_commit_callbacks
+):
+    recipes = populate(1)
+    warm_up()
+    with django_capture_on_commit_callbacks(execute=True):
+        response = user_client.delete(
+            f'/api/recipes/{recipes[0].id}/favorite/'
+        )
+    assert response.status_code == 204
+    with CaptureQueriesContext(connection) as queries:
+        user_client.get('/api/ingredients/')
+    assert not [
+        query for query in queries if 'api_ingredient' in query['sql']
+    ]